@@ -1,14 +1,19 @@
 """Agentic loop — stream response, execute tool calls, re-prompt."""
 
-import json
-
 import httpx
 
 from llaminal.client import LlaminalClient
 from llaminal.render import StreamRenderer, render_error, render_tool_call, render_tool_result
 from llaminal.session import Session
+from llaminal.tool_args import parse_arguments
 from llaminal.tools.registry import ToolRegistry
 
+# httpx exception types, resolved once for the except clauses below
+_CONN_ERR = httpx.ConnectError
+_TIMEOUT_ERR = httpx.TimeoutException
+_INTERRUPT_ERRS = (httpx.RemoteProtocolError, httpx.ReadError)
+_STATUS_ERR = httpx.HTTPStatusError
+
 
 async def run_agent_loop(
     client: LlaminalClient,
@@ -17,36 +22,45 @@ async def run_agent_loop(
     show_stats: bool = False,
 ) -> None:
     """Run the agent loop until the model produces a plain text response (no tool calls)."""
+    # Tool schemas are static for the duration of a turn
+    tools_schema = registry.to_openai_schema() or None
+
     while True:
         renderer = StreamRenderer(show_stats=show_stats)
-        tool_calls_by_index: dict[int, dict] = {}
+        # Per-index name/argument fragments, joined once the stream ends
+        tool_call_parts: dict[int, dict] = {}
 
         try:
             renderer.start()
             async for delta in client.stream_chat(
                 session.get_messages(),
-                tools=registry.to_openai_schema() or None,
+                tools=tools_schema,
             ):
-                # Accumulate and render content tokens
-                if delta.content:
-                    renderer.update(delta.content)
+                # Accumulate and render content tokens (None and "" both skipped)
+                content = delta.content
+                if content:
+                    renderer.update(content)
 
                 # Accumulate tool call deltas
-                if delta.tool_calls:
-                    for tc_delta in delta.tool_calls:
+                tc_deltas = delta.tool_calls
+                if tc_deltas:
+                    for tc_delta in tc_deltas:
                         idx = tc_delta["index"]
-                        if idx not in tool_calls_by_index:
-                            tool_calls_by_index[idx] = {
+                        parts = tool_call_parts.get(idx)
+                        if parts is None:
+                            parts = tool_call_parts[idx] = {
                                 "id": tc_delta.get("id", f"call_{idx}"),
-                                "type": "function",
-                                "function": {"name": "", "arguments": ""},
+                                "name": [],
+                                "arguments": [],
                             }
-                        tc = tool_calls_by_index[idx]
-                        fn = tc_delta.get("function", {})
-                        if "name" in fn:
-                            tc["function"]["name"] += fn["name"]
-                        if "arguments" in fn:
-                            tc["function"]["arguments"] += fn["arguments"]
+                        fn = tc_delta.get("function")
+                        if fn is not None:
+                            args = fn.get("arguments")
+                            if args:
+                                parts["arguments"].append(args)
+                            name = fn.get("name")
+                            if name:
+                                parts["name"].append(name)
 
         except KeyboardInterrupt:
             # Ctrl+C mid-stream: save what we have, don't corrupt session
@@ -56,35 +70,35 @@ async def run_agent_loop(
                 session.add_assistant(full_content)
             raise
 
-        except httpx.ConnectError:
+        except _CONN_ERR:
             renderer.stop()
             render_error(
                 f"Could not connect to {client.base_url}.\n"
                 "  Is your LLM server running? Try:\n"
                 "    llama-server -m model.gguf --port 8080"
             )
-            _pop_last_user_message(session)
+            session.rollback_last_user()
             return
 
-        except httpx.TimeoutException:
+        except _TIMEOUT_ERR:
             renderer.stop()
             render_error(
                 "Request timed out. The model may be loading or the server may be overloaded.\n"
                 "  Try again in a moment."
             )
-            _pop_last_user_message(session)
+            session.rollback_last_user()
             return
 
-        except (httpx.RemoteProtocolError, httpx.ReadError):
+        except _INTERRUPT_ERRS:
             renderer.stop()
             render_error(
                 "Connection was interrupted. The server may have closed unexpectedly.\n"
                 "  Check that your server is still running and try again."
             )
-            _pop_last_user_message(session)
+            session.rollback_last_user()
             return
 
-        except httpx.HTTPStatusError as e:
+        except _STATUS_ERR as e:
             renderer.stop()
             code = e.response.status_code
             if code in (401, 403):
@@ -112,7 +126,18 @@ async def run_agent_loop(
             return
 
         full_content = renderer.get_text()
-        tool_calls = [tool_calls_by_index[i] for i in sorted(tool_calls_by_index)]
+        # Providers stream tool calls in index order, so first-seen order is final
+        tool_calls = [
+            {
+                "id": parts["id"],
+                "type": "function",
+                "function": {
+                    "name": "".join(parts["name"]),
+                    "arguments": "".join(parts["arguments"]),
+                },
+            }
+            for parts in tool_call_parts.values()
+        ]
 
         if not tool_calls:
             # Plain text response — finalize as Markdown, turn is complete
@@ -127,10 +152,7 @@ async def run_agent_loop(
 
         for tc in tool_calls:
             fn_name = tc["function"]["name"]
-            try:
-                fn_args = json.loads(tc["function"]["arguments"]) if tc["function"]["arguments"] else {}
-            except json.JSONDecodeError:
-                fn_args = {}
+            fn_args = parse_arguments(tc["function"]["arguments"])
 
             render_tool_call(fn_name, fn_args)
             result = await registry.execute(fn_name, fn_args)
@@ -138,9 +160,3 @@ async def run_agent_loop(
             session.add_tool_result(tc["id"], result)
 
         # Loop back to re-prompt the model with tool results
-
-
-def _pop_last_user_message(session: Session) -> None:
-    """Remove the last user message so the user can retry after a failure."""
-    if session.messages and session.messages[-1]["role"] == "user":
-        session.messages.pop()
@@ -1,6 +1,7 @@
 """AI mode — handles input, rendering, and agent loop when AI mode is active."""
 
 import asyncio
+import functools
 import os
 import sys
 import termios
@@ -11,25 +12,54 @@ from rich.text import Text
 
 from llaminal.agent import run_agent_loop
 from llaminal.client import LlaminalClient
-from llaminal.render import render_error
+from llaminal.render import console, render_error
 from llaminal.session import Session
 from llaminal.storage import Storage
 from llaminal.themes import get_theme
 from llaminal.tools.registry import ToolRegistry
 
-console = Console()
-
 PROMPT_TEXT = "\U0001f999> "  # 🦙>
 
 # Terminal title OSC sequences
 _TITLE_AI_MODE = b"\x1b]0;llaminal \xf0\x9f\xa6\x99 AI Mode\x07"  # 🦙
 _TITLE_RESET = b"\x1b]0;\x07"
 
+# Precomputed cursor-movement escapes for the common (short-line) case
+_CUB = tuple(f"\x1b[{n}D".encode() for n in range(256))  # cursor back
+_CUF = tuple(f"\x1b[{n}C".encode() for n in range(256))  # cursor forward
+
+
+def _cursor_back(n: int) -> bytes:
+    return _CUB[n] if n < 256 else f"\x1b[{n}D".encode()
+
+
+def _cursor_forward(n: int) -> bytes:
+    return _CUF[n] if n < 256 else f"\x1b[{n}C".encode()
+
+
+# AI-mode line editing: control byte → AIMode handler method
+_CONTROL_HANDLERS = {
+    0x1B: "_on_escape",  # ESC / escape sequences
+    0x0D: "_on_enter",
+    0x7F: "_on_backspace",
+    0x08: "_on_backspace",
+    0x03: "_on_ctrl_c",
+    0x04: "_on_ctrl_d",
+    0x01: "_on_ctrl_a",  # Home
+    0x05: "_on_ctrl_e",  # End
+    0x15: "_on_ctrl_u",  # Kill line
+}
+
 
 def _styled_prompt_bytes() -> bytes:
     """Render the prompt with theme color as ANSI escape bytes."""
-    theme = get_theme()
-    t = Text(PROMPT_TEXT, style=theme.ai_prompt)
+    return _render_prompt(get_theme().ai_prompt)
+
+
+@functools.lru_cache(maxsize=4)
+def _render_prompt(style: str) -> bytes:
+    """Render PROMPT_TEXT in the given style (cached — called per keystroke)."""
+    t = Text(PROMPT_TEXT, style=style)
     ansi_console = Console(force_terminal=True)
     with ansi_console.capture() as capture:
         ansi_console.print(t, end="")
@@ -50,9 +80,12 @@ class AIMode:
         show_stats: bool = False,
         context_provider=None,
         cwd_provider=None,
+        client_task: asyncio.Task | None = None,
     ):
         self._shell = shell_wrapper
         self._client = client
+        # Pending server discovery that resolves to a client (or None)
+        self._client_task = client_task
         self._session = session
         self._registry = registry
         self._storage = storage
@@ -67,6 +100,17 @@ class AIMode:
         self._save_index = len(session.messages)
         self._running_agent = False
         self._pty_executing = False
+        self._stdout_fd = sys.stdout.fileno()
+
+        # Byte → handler table for handle_input; None means printable/ignored
+        self._dispatch: list = [None] * 256
+        for code, name in _CONTROL_HANDLERS.items():
+            self._dispatch[code] = getattr(self, name)
+
+        # Background persistence — one writer task saves in a worker thread;
+        # snapshots taken while it's busy are coalesced into its next batch
+        self._unsaved: list[dict] | None = None
+        self._save_task: asyncio.Task | None = None
 
     @property
     def active(self) -> bool:
@@ -143,75 +187,107 @@ class AIMode:
                 # else: KeyboardInterrupt is handled by the agent loop
             return
 
+        dispatch = self._dispatch
+        n = len(data)
         i = 0
-        while i < len(data):
+        while i < n:
             b = data[i]
+            handler = dispatch[b]
+            if handler is not None:
+                next_i = handler(data, i + 1)
+                if next_i is None:
+                    return
+                i = next_i
+            elif b >= 0x20:  # Printable characters
+                i = self._insert_printable(data, i)
+            else:
+                i += 1  # Other control bytes are ignored
+
+    # Control-byte handlers: called with the index just past the control
+    # byte, return the index to resume from, or None to stop processing.
+
+    def _on_escape(self, data: bytes, i: int) -> int | None:
+        # Check for escape sequence (arrow keys, etc.)
+        if i < len(data) and data[i] == 0x5B:  # ESC [
             i += 1
+            if i < len(data):
+                code = data[i]
+                i += 1
+                if code == 0x44:  # Left arrow
+                    self._move_cursor_left()
+                elif code == 0x43:  # Right arrow
+                    self._move_cursor_right()
+                elif code == 0x48:  # Home
+                    self._move_cursor_home()
+                elif code == 0x46:  # End
+                    self._move_cursor_end()
+                # Ignore other escape sequences
+            return i
+        # Single ESC — exit AI mode
+        self.exit()
+        return None
+
+    def _on_enter(self, data: bytes, i: int) -> int:
+        line = self._buffer.decode("utf-8", errors="replace").strip()
+        self._write_output(b"\r\n")
+        if line:
+            asyncio.get_running_loop().create_task(self._run_query(line))
+        else:
+            # Empty enter — just redraw prompt
+            self._write_output(_styled_prompt_bytes())
+        self._buffer.clear()
+        self._cursor_pos = 0
+        return i
 
-            if b == 0x1B:  # ESC
-                # Check for escape sequence (arrow keys, etc.)
-                if i < len(data) and data[i] == 0x5B:  # ESC [
-                    i += 1
-                    if i < len(data):
-                        code = data[i]
-                        i += 1
-                        if code == 0x44:  # Left arrow
-                            self._move_cursor_left()
-                        elif code == 0x43:  # Right arrow
-                            self._move_cursor_right()
-                        elif code == 0x48:  # Home
-                            self._move_cursor_home()
-                        elif code == 0x46:  # End
-                            self._move_cursor_end()
-                        # Ignore other escape sequences
-                else:
-                    # Single ESC — exit AI mode
-                    self.exit()
-                    return
+    def _on_backspace(self, data: bytes, i: int) -> int:
+        if self._cursor_pos > 0:
+            del self._buffer[self._cursor_pos - 1]
+            self._cursor_pos -= 1
+            self._redraw_line()
+        return i
 
-            elif b == 0x0D:  # Enter
-                line = self._buffer.decode("utf-8", errors="replace").strip()
-                self._write_output(b"\r\n")
-                if line:
-                    asyncio.get_running_loop().create_task(self._run_query(line))
-                else:
-                    # Empty enter — just redraw prompt
-                    self._write_output(_styled_prompt_bytes())
-                self._buffer.clear()
-                self._cursor_pos = 0
-
-            elif b == 0x7F or b == 0x08:  # Backspace
-                if self._cursor_pos > 0:
-                    del self._buffer[self._cursor_pos - 1]
-                    self._cursor_pos -= 1
-                    self._redraw_line()
-
-            elif b == 0x03:  # Ctrl+C
-                self._buffer.clear()
-                self._cursor_pos = 0
-                self._write_output(b"^C\r\n")
-                self._write_output(_styled_prompt_bytes())
-
-            elif b == 0x04:  # Ctrl+D
-                if not self._buffer:
-                    self.exit()
-                    return
+    def _on_ctrl_c(self, data: bytes, i: int) -> int:
+        self._buffer.clear()
+        self._cursor_pos = 0
+        self._write_output(b"^C\r\n")
+        self._write_output(_styled_prompt_bytes())
+        return i
 
-            elif b == 0x01:  # Ctrl+A (Home)
-                self._move_cursor_home()
+    def _on_ctrl_d(self, data: bytes, i: int) -> int | None:
+        if not self._buffer:
+            self.exit()
+            return None
+        return i
 
-            elif b == 0x05:  # Ctrl+E (End)
-                self._move_cursor_end()
+    def _on_ctrl_a(self, data: bytes, i: int) -> int:
+        self._move_cursor_home()
+        return i
 
-            elif b == 0x15:  # Ctrl+U (kill line)
-                self._buffer.clear()
-                self._cursor_pos = 0
-                self._redraw_line()
+    def _on_ctrl_e(self, data: bytes, i: int) -> int:
+        self._move_cursor_end()
+        return i
 
-            elif b >= 0x20:  # Printable characters
-                self._buffer.insert(self._cursor_pos, b)
-                self._cursor_pos += 1
-                self._redraw_line()
+    def _on_ctrl_u(self, data: bytes, i: int) -> int:
+        self._buffer.clear()
+        self._cursor_pos = 0
+        self._redraw_line()
+        return i
+
+    def _insert_printable(self, data: bytes, i: int) -> int:
+        """Insert the run of printable bytes starting at data[i] (e.g. a paste)."""
+        j = i + 1
+        while j < len(data) and data[j] >= 0x20 and data[j] != 0x7F:
+            j += 1
+        run = data[i:j]
+        at_end = self._cursor_pos == len(self._buffer)
+        self._buffer[self._cursor_pos : self._cursor_pos] = run
+        self._cursor_pos += len(run)
+        if at_end:
+            # Typing at end of line — just echo the bytes
+            self._write_output(run)
+        else:
+            self._redraw_line()
+        return j
 
     def _move_cursor_left(self) -> None:
         if self._cursor_pos > 0:
@@ -225,61 +301,64 @@ class AIMode:
 
     def _move_cursor_home(self) -> None:
         if self._cursor_pos > 0:
-            self._write_output(f"\x1b[{self._cursor_pos}D".encode())
+            self._write_output(_cursor_back(self._cursor_pos))
             self._cursor_pos = 0
 
     def _move_cursor_end(self) -> None:
         remaining = len(self._buffer) - self._cursor_pos
         if remaining > 0:
-            self._write_output(f"\x1b[{remaining}C".encode())
+            self._write_output(_cursor_forward(remaining))
             self._cursor_pos = len(self._buffer)
 
     def _redraw_line(self) -> None:
         """Redraw the current input line."""
-        self._write_output(b"\r")
-        self._write_output(b"\x1b[K")  # Clear line
-        self._write_output(_styled_prompt_bytes())
-        text = self._buffer.decode("utf-8", errors="replace")
-        self._write_output(text.encode("utf-8"))
+        # Return, clear line, prompt, buffer — all in a single writev.
+        # The buffer already holds the UTF-8 bytes typed by the user.
+        segments = [b"\r\x1b[K", _styled_prompt_bytes(), bytes(self._buffer)]
         # Move cursor to correct position
         chars_after = len(self._buffer) - self._cursor_pos
         if chars_after > 0:
-            self._write_output(f"\x1b[{chars_after}D".encode())
+            segments.append(_cursor_back(chars_after))
+        try:
+            os.writev(self._stdout_fd, segments)
+        except OSError:
+            pass
 
     def _write_output(self, data: bytes) -> None:
         """Write bytes directly to stdout."""
         try:
-            os.write(sys.stdout.fileno(), data)
+            os.write(self._stdout_fd, data)
         except OSError:
             pass
 
     async def _run_query(self, text: str) -> None:
         """Send user text to the agent loop and stream the response."""
-        if not self._client:
-            self._write_output(
-                b"\x1b[33mNo model server found. Run `ollama serve` or "
-                b"`llama-server` to enable AI.\x1b[0m\r\n"
-            )
-            self._write_output(_styled_prompt_bytes())
-            return
-
+        # Set before waiting on server discovery, so another Enter meanwhile
+        # can't start a second query on the same session
         self._running_agent = True
+        try:
+            if self._client_task is not None:
+                self._client = await self._client_task
+                self._client_task = None
+            if not self._client:
+                self._write_output(
+                    b"\x1b[33mNo model server found. Run `ollama serve` or "
+                    b"`llama-server` to enable AI.\x1b[0m\r\n"
+                )
+                return
 
-        # Restore terminal to cooked mode for Rich rendering
-        self._shell_to_cooked()
+            # Restore terminal to cooked mode for Rich rendering
+            self._shell_to_cooked()
 
-        try:
             self._session.add_user(text)
-            console.print()
+            # Plain write, not console.print() — keeps Rich off the path
+            # between Enter and the request going out
+            self._write_output(b"\n")
             await run_agent_loop(
                 self._client, self._session, self._registry,
                 show_stats=self._show_stats,
             )
-            # Persist messages
-            self._storage.save_messages(
-                self._session_id, self._session.messages, self._save_index
-            )
-            self._save_index = len(self._session.messages)
+            self._persist_messages()
             console.print()
         except KeyboardInterrupt:
             console.print("\n[yellow]Generation cancelled.[/yellow]")
@@ -291,6 +370,43 @@ class AIMode:
             self._running_agent = False
             self._write_output(_styled_prompt_bytes())
 
+    def _persist_messages(self) -> None:
+        """Save new messages in the background so the prompt returns immediately."""
+        self._unsaved = list(self._session.messages)
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.get_running_loop().create_task(self._write_unsaved())
+
+    async def _write_unsaved(self) -> None:
+        """Write the latest snapshot until none is left, one transaction each."""
+        while self._unsaved is not None:
+            messages, self._unsaved = self._unsaved, None
+            try:
+                await asyncio.to_thread(
+                    self._storage.save_messages, self._session_id, messages, self._save_index
+                )
+                # Only advanced once written, so a failed save is retried next time
+                self._save_index = len(messages)
+            except Exception as e:
+                self._write_output(
+                    f"\r\n\x1b[33mCould not save conversation: {e}\x1b[0m\r\n".encode()
+                )
+
+    def detach_client(self) -> LlaminalClient | None:
+        """Return the client for closing, cancelling discovery if it's still running."""
+        task, self._client_task = self._client_task, None
+        if task is not None:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is None:
+                self._client = task.result()
+        client, self._client = self._client, None
+        return client
+
+    async def flush_saves(self) -> None:
+        """Wait for any in-flight background saves to finish."""
+        if self._save_task is not None:
+            await asyncio.gather(self._save_task, return_exceptions=True)
+
     def _shell_to_cooked(self) -> None:
         """Temporarily restore terminal to cooked mode for Rich output."""
         if self._shell._original_termios is not None:
@@ -1,33 +1,71 @@
 """Entry point — shell wrapper launch, click CLI, config resolution."""
 
-import asyncio
+import functools
+import importlib
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import click
-from rich.console import Console
-from rich.table import Table
 
-from llaminal.client import LlaminalClient
 from llaminal.config import DEFAULTS, load_config, resolve
-from llaminal.discover import discover_servers
-from llaminal.moods import MOOD_NAMES, MOODS
-from llaminal.session import Session
-from llaminal.storage import Storage
-from llaminal.themes import THEME_NAMES, THEMES, set_theme
-from llaminal.tools.bash import bash_tool
-from llaminal.tools.files import list_files_tool, read_file_tool, write_file_tool
-from llaminal.tools.registry import ToolRegistry
 
-console = Console()
+# Everything else (asyncio, rich, httpx, sqlite, tools, moods, themes) is
+# imported where it's used, so --help and --history don't pay for it.
+if TYPE_CHECKING:
+    from collections.abc import Coroutine
 
+    from rich.console import Console
+
+    from llaminal.tools.registry import ToolRegistry
+
+
+@functools.cache
+def _console() -> "Console":
+    """Shared console, created on first use (--help never needs one)."""
+    from rich.console import Console
+
+    return Console()
+
+
+class _LazyChoice(click.Choice):
+    """click.Choice whose names are imported from a module on first use."""
+
+    def __init__(self, module: str, attr: str) -> None:
+        self._source = (module, attr)
+        self._names: tuple[str, ...] | None = None
+        super().__init__((), case_sensitive=False)
+
+    @property  # type: ignore[override]
+    def choices(self) -> tuple[str, ...]:
+        if self._names is None:
+            module, attr = self._source
+            self._names = tuple(getattr(importlib.import_module(module), attr))
+        return self._names
+
+    @choices.setter
+    def choices(self, names: tuple[str, ...]) -> None:
+        # click.Choice.__init__ assigns the (empty) choices it was given;
+        # only a non-empty assignment replaces the lazily imported names
+        if names:
+            self._names = tuple(names)
+
+
+_LOCALHOST_PREFIX = "http://localhost:"
+
+
+def _localhost(port: int) -> str:
+    """Base URL for a server on the given local port."""
+    return f"{_LOCALHOST_PREFIX}{port}"
+
+
+def build_registry() -> "ToolRegistry":
+    from llaminal.tools.bash import bash_tool
+    from llaminal.tools.files import list_files_tool, read_file_tool, write_file_tool
+    from llaminal.tools.registry import ToolRegistry
 
-def build_registry() -> ToolRegistry:
     registry = ToolRegistry()
-    registry.register(bash_tool)
-    registry.register(read_file_tool)
-    registry.register(write_file_tool)
-    registry.register(list_files_tool)
+    registry.register_many(bash_tool, read_file_tool, write_file_tool, list_files_tool)
     return registry
 
 
@@ -41,41 +79,73 @@ async def _run_shell(
     show_stats: bool = False,
     shell: str | None = None,
     context_lines: int = 50,
+    http2: bool = False,
+    max_messages: int | None = None,
 ) -> None:
+    import asyncio
     import os
 
     from llaminal.ai_mode import AIMode
+    from llaminal.client import LlaminalClient
     from llaminal.cwd_tracker import CwdTracker
+    from llaminal.prompt import set_line_reader
+    from llaminal.render import set_console_size
     from llaminal.scrollback import ScrollbackCapture
+    from llaminal.session import Session
     from llaminal.shell import ShellWrapper
+    from llaminal.storage import Storage
+
+    def make_client(url: str) -> LlaminalClient:
+        return LlaminalClient(
+            base_url=url, model=model, api_key=api_key, temperature=temperature,
+            http2=http2,
+        )
 
     # Build AI components
     client = None
     if base_url:
-        client = LlaminalClient(
-            base_url=base_url, model=model, api_key=api_key, temperature=temperature
-        )
+        client = make_client(base_url)
 
     storage = Storage()
     registry = build_registry()
 
+    # Resolve --resume last on the same connection the session is loaded from
+    if resume_id == "last":
+        resume_id = storage.get_latest_session_id()
+        if resume_id is None:
+            _console().print("[bold red]Error:[/bold red] No previous sessions to resume.")
+            if client:
+                await client.close()
+            storage.close()
+            raise SystemExit(1)
+
     # Resume existing session or start new one
     if resume_id:
         messages = storage.load_session(resume_id)
         if not messages:
-            console.print(f"[bold red]Error:[/bold red] Session '{resume_id}' not found.")
+            _console().print(f"[bold red]Error:[/bold red] Session '{resume_id}' not found.")
             if client:
                 await client.close()
             storage.close()
             return
-        session = Session(system_prompt=system_prompt)
+        session = Session(system_prompt=system_prompt, max_messages=max_messages)
         session.messages = messages
         session_id = resume_id
     else:
-        session = Session(system_prompt=system_prompt)
+        session = Session(system_prompt=system_prompt, max_messages=max_messages)
         session_id = storage.create_session(model)
         storage.save_messages(session_id, session.messages, 0)
 
+    # No server configured: scan for one while the shell spawns. AI mode
+    # awaits the result on the first query if the scan is still running.
+    client_task = None
+    if client is None:
+        async def _discover_client() -> LlaminalClient | None:
+            url = await _auto_detect()
+            return make_client(url) if url else None
+
+        client_task = asyncio.create_task(_discover_client())
+
     # Create shell wrapper
     wrapper = ShellWrapper(shell=shell)
 
@@ -84,9 +154,13 @@ async def _run_shell(
     scrollback = ScrollbackCapture(size.columns, size.lines)
     wrapper.add_master_output_callback(scrollback.feed)
     wrapper.add_resize_callback(scrollback.resize)
+    set_console_size(size.lines, size.columns)
+    wrapper.add_resize_callback(set_console_size)
 
     # Spawn shell first so we have child_pid for CwdTracker
     wrapper.spawn()
+    # Tool confirmations read their answer through the wrapper's stdin reader
+    set_line_reader(wrapper.read_line)
 
     # Track child shell's cwd
     cwd_tracker = CwdTracker(wrapper.child_pid)
@@ -95,7 +169,7 @@ async def _run_shell(
     from llaminal.pty_executor import PtyExecutor
     from llaminal.tools.registry import Tool
 
-    pty_executor = PtyExecutor(wrapper, scrollback)
+    pty_executor = PtyExecutor(wrapper, scrollback, cwd_provider=cwd_tracker.get_cwd)
 
     async def _pty_bash(command: str) -> str:
         ai_handler._pty_executing = True
@@ -120,12 +194,13 @@ async def _run_shell(
         },
         execute=_pty_bash,
     )
-    registry.register(pty_bash_tool)
+    registry.register(pty_bash_tool, replace=True)
 
     # Create AI mode handler
     ai_handler = AIMode(
         shell_wrapper=wrapper,
         client=client,
+        client_task=client_task,
         session=session,
         registry=registry,
         storage=storage,
@@ -145,19 +220,30 @@ async def _run_shell(
         await wrapper.run()
     finally:
         wrapper.cleanup()
+        await ai_handler.flush_saves()
+        client = ai_handler.detach_client()
         if client:
             await client.close()
         storage.close()
 
+    # Exit with the shell's status, as a shell would (128 + n if killed by signal n)
+    code = wrapper.exit_code
+    if code:
+        raise SystemExit(code if code > 0 else 128 - code)
+
 
 def _show_history() -> None:
     """Display recent conversation sessions."""
+    from rich.table import Table
+
+    from llaminal.storage import Storage
+
     storage = Storage()
     sessions = storage.list_sessions()
     storage.close()
 
     if not sessions:
-        console.print("[dim]No conversation history yet.[/dim]")
+        _console().print("[dim]No conversation history yet.[/dim]")
         return
 
     table = Table(title="Recent Sessions", border_style="dim")
@@ -167,12 +253,15 @@ def _show_history() -> None:
     table.add_column("Messages", justify="right")
     table.add_column("Date", style="dim")
 
-    for s in sessions:
-        date = s["created_at"][:10]
-        table.add_row(s["id"], s["title"], s["model"], str(s["message_count"]), date)
+    rows = [
+        (s["id"], s["title"], s["model"], str(s["message_count"]), s["created_at"][:10])
+        for s in sessions
+    ]
+    for row in rows:
+        table.add_row(*row)
 
-    console.print(table)
-    console.print("\n[dim]Resume a session with: llaminal --resume <ID>[/dim]")
+    _console().print(table)
+    _console().print("\n[dim]Resume a session with: llaminal --resume <ID>[/dim]")
 
 
 @click.command()
@@ -186,8 +275,8 @@ def _show_history() -> None:
 @click.option("--resume", "resume_id", default=None, help="Resume a previous session (ID, or 'last' for most recent).")
 @click.option("--history", "show_history", is_flag=True, help="Show recent conversation sessions.")
 @click.option("--stats", "show_stats", is_flag=True, help="Show token/sec and latency stats after each response.")
-@click.option("--mood", default=None, type=click.Choice(MOOD_NAMES, case_sensitive=False), help="Use a persona preset (e.g. pirate, poet, senior-engineer).")
-@click.option("--theme", default=None, type=click.Choice(THEME_NAMES, case_sensitive=False), help="Color theme (default, light, solarized, dracula, catppuccin, llama).")
+@click.option("--mood", default=None, type=_LazyChoice("llaminal.moods", "MOOD_NAMES"), help="Use a persona preset (e.g. pirate, poet, senior-engineer).")
+@click.option("--theme", default=None, type=_LazyChoice("llaminal.themes", "THEME_NAMES"), help="Color theme (default, light, solarized, dracula, catppuccin, llama).")
 @click.option("--shell", "shell_cmd", default=None, help="Shell to launch (default: $SHELL).")
 @click.option("--context-lines", default=None, type=int, help="Number of terminal lines to capture as AI context (default: 50).")
 def main(
@@ -211,12 +300,15 @@ def main(
         _show_history()
         return
 
+    from llaminal.moods import MOOD_NAMES, MOODS
+    from llaminal.themes import THEME_NAMES, THEMES, set_theme
+
     cfg = load_config(config_path)
 
     # Set color theme early so all rendering uses it
     theme_name = resolve(theme, cfg.get("theme"), "default")
     if theme_name not in THEMES:
-        console.print(f"[bold red]Error:[/bold red] Unknown theme '{theme_name}'. Options: {', '.join(THEME_NAMES)}")
+        _console().print(f"[bold red]Error:[/bold red] Unknown theme '{theme_name}'. Options: {', '.join(THEME_NAMES)}")
         raise SystemExit(1)
     set_theme(theme_name)
 
@@ -234,7 +326,7 @@ def main(
         pass
     elif mood is not None:
         if mood not in MOODS:
-            console.print(f"[bold red]Error:[/bold red] Unknown mood '{mood}'. Options: {', '.join(MOOD_NAMES)}")
+            _console().print(f"[bold red]Error:[/bold red] Unknown mood '{mood}'. Options: {', '.join(MOOD_NAMES)}")
             raise SystemExit(1)
         system_prompt = MOODS[mood]
     else:
@@ -242,54 +334,52 @@ def main(
 
     # Base URL resolution
     if base_url is None:
-        if port is not None:
-            base_url = f"http://localhost:{port}"
-        else:
-            base_url = resolve(None, cfg.get("base_url"), None)
-            if base_url is None and cfg.get("port") is not None:
-                base_url = f"http://localhost:{cfg['port']}"
-
-    if base_url is None:
-        # Try auto-detection (non-blocking)
-        base_url = _auto_detect()
+        if port is None:
+            base_url = cfg.get("base_url")
+            if base_url is None:
+                port = cfg.get("port")
+        if base_url is None and port is not None:
+            base_url = _localhost(port)
 
     # No server is NOT fatal anymore — shell still works, AI mode shows a message
     show_stats = show_stats or cfg.get("stats", False)
-
-    # Resolve --resume last
-    if resume_id == "last":
-        storage = Storage()
-        resume_id = storage.get_latest_session_id()
-        storage.close()
-        if resume_id is None:
-            console.print("[bold red]Error:[/bold red] No previous sessions to resume.")
-            raise SystemExit(1)
+    http2 = cfg.get("http2", DEFAULTS["http2"])
+    max_messages = cfg.get("max_messages", DEFAULTS["max_messages"])
 
     # Require a real terminal
     if not sys.stdin.isatty():
-        console.print("[bold red]Error:[/bold red] llaminal requires an interactive terminal.")
+        _console().print("[bold red]Error:[/bold red] llaminal requires an interactive terminal.")
         raise SystemExit(1)
 
-    asyncio.run(
+    _run(
         _run_shell(
             base_url, model, api_key, temperature, system_prompt,
-            resume_id, show_stats, shell_cmd, context_lines,
+            resume_id, show_stats, shell_cmd, context_lines, http2, max_messages,
         )
     )
 
 
-def _auto_detect() -> str | None:
+def _run(coro: "Coroutine[Any, Any, Any]") -> Any:
+    """Run a coroutine on uvloop when it's installed, else on stock asyncio."""
+    try:
+        import uvloop
+    except ImportError:
+        import asyncio
+
+        return asyncio.run(coro)
+    return uvloop.run(coro)
+
+
+async def _auto_detect() -> str | None:
     """Scan common ports for a running LLM server. Returns base_url or None."""
-    found = asyncio.run(discover_servers())
+    from llaminal.discover import discover_servers
+
+    found = await discover_servers()
 
     if not found:
         return None
 
-    if len(found) == 1:
-        url, _label = found[0]
-        return url
-
-    # Multiple servers — just pick the first one (no interactive prompt in raw mode)
+    # One or more servers — pick the first (no interactive menu in raw mode)
     url, _label = found[0]
     return url
 
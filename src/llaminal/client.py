@@ -1,5 +1,6 @@
 """Async OpenAI-compatible HTTP client for llama.cpp and similar servers."""
 
+import importlib.util
 import json
 from collections.abc import AsyncIterator
 from dataclasses import dataclass
@@ -7,8 +8,44 @@ from typing import Any
 
 import httpx
 
+try:
+    # Encodes the request body and decodes each SSE chunk; orjson comes with
+    # the optional "fast" extra
+    from orjson import dumps as _dumps
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
 
-@dataclass
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+_CHAT_URL = "/v1/chat/completions"
+_DATA = b"data:"
+_DATA_LEN = len(_DATA)
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+async def _iter_sse_data(resp: httpx.Response) -> AsyncIterator[bytearray]:
+    """Yield the payload of each SSE ``data:`` line as raw bytes.
+
+    Lines are split out of the byte stream directly, so nothing is decoded
+    to str except by the JSON parser itself.
+    """
+    buf = bytearray()
+    async for raw in resp.aiter_bytes():
+        buf += raw
+        start = 0
+        while (nl := buf.find(b"\n", start)) != -1:
+            if buf.startswith(_DATA, start):
+                # strip(), not lstrip(): CRLF streams leave a trailing \r
+                yield buf[start + _DATA_LEN:nl].strip()
+            start = nl + 1
+        del buf[:start]
+    if buf.startswith(_DATA):
+        yield buf[_DATA_LEN:].strip()
+
+
+@dataclass(slots=True)
 class Delta:
     """A single streamed delta from the API."""
     content: str | None = None
@@ -25,6 +62,7 @@ class LlaminalClient:
         model: str = "local-model",
         api_key: str | None = None,
         temperature: float | None = None,
+        http2: bool = False,
     ):
         self.base_url = base_url.rstrip("/")
         self.model = model
@@ -34,9 +72,26 @@ class LlaminalClient:
         if api_key:
             headers["Authorization"] = f"Bearer {api_key}"
 
+        if http2 and importlib.util.find_spec("h2") is None:
+            http2 = False  # needs httpx[http2]; stay on HTTP/1.1
+
         self._client = httpx.AsyncClient(
-            base_url=self.base_url, timeout=120.0, headers=headers
+            base_url=self.base_url,
+            timeout=120.0,
+            headers=headers,
+            transport=httpx.AsyncHTTPTransport(retries=0, http2=http2),
         )
+        self._tools_json: tuple[list[dict], bytes] | None = None
+
+    def _encode_tools(self, tools: list[dict]) -> bytes:
+        """Return tools as JSON, reusing the last encoding for the same list.
+
+        ToolRegistry hands back one cached schema list until a tool is
+        registered, so in practice the schema is encoded once per session.
+        """
+        if self._tools_json is None or self._tools_json[0] is not tools:
+            self._tools_json = (tools, _dumps(tools))
+        return self._tools_json[1]
 
     async def close(self) -> None:
         await self._client.aclose()
@@ -50,24 +105,23 @@ class LlaminalClient:
             "messages": messages,
             "stream": True,
         }
-        if tools:
-            payload["tools"] = tools
         if self.temperature is not None:
             payload["temperature"] = self.temperature
 
+        # Serialize the body ourselves instead of going through httpx's json=
+        body = _dumps(payload)
+        if tools:
+            body = body[:-1] + b',"tools":' + self._encode_tools(tools) + b"}"
         async with self._client.stream(
-            "POST", "/v1/chat/completions", json=payload
+            "POST", _CHAT_URL, content=body, headers=_JSON_HEADERS
         ) as resp:
             resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if not line.startswith("data:"):
-                    continue
-                data = line[len("data:"):].strip()
-                if data == "[DONE]":
+            async for data in _iter_sse_data(resp):
+                if data == b"[DONE]":
                     return
 
                 try:
-                    chunk = json.loads(data)
+                    chunk = _loads(data)
                 except json.JSONDecodeError:
                     # Skip malformed chunks from the model
                     continue
@@ -1,14 +1,10 @@
 """Config file loading and resolution."""
 
+import json
 import sys
 from pathlib import Path
 from typing import Any
 
-if sys.version_info >= (3, 11):
-    import tomllib
-else:
-    import tomli as tomllib
-
 DEFAULT_CONFIG_PATH = Path.home() / ".config" / "llaminal" / "config.toml"
 
 DEFAULTS: dict[str, Any] = {
@@ -20,16 +16,53 @@ DEFAULTS: dict[str, Any] = {
     "system_prompt": None,
     "shell": None,
     "context_lines": 50,
+    "http2": False,
+    "max_messages": None,
 }
 
 
 def load_config(path: Path | None = None) -> dict[str, Any]:
-    """Load config from TOML file. Returns empty dict if file doesn't exist."""
+    """Load config from TOML file. Returns empty dict if file doesn't exist.
+
+    The default config's parsed result is cached as JSON beside it
+    (config.toml.cache) and reused while the file's mtime and size are
+    unchanged. A --config file elsewhere is always parsed, so no cache file
+    is left in project or shared directories.
+    """
     config_path = path or DEFAULT_CONFIG_PATH
-    if not config_path.exists():
+    try:
+        st = config_path.stat()
+    except FileNotFoundError:
         return {}
+    key = [st.st_mtime_ns, st.st_size]
+    cache_path = None
+    if config_path == DEFAULT_CONFIG_PATH:
+        cache_path = config_path.with_name(config_path.name + ".cache")
+        try:
+            with open(cache_path, "rb") as f:
+                cached = json.load(f)
+            if cached["key"] == key:
+                return cached["config"]
+        except Exception:
+            pass  # missing, stale format, or unreadable — fall back to parsing
+
+    # Only pay for the TOML parser when there's actually something to parse
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+
     with open(config_path, "rb") as f:
-        return tomllib.load(f)
+        config = tomllib.load(f)
+
+    if cache_path is not None:
+        try:
+            # TOML dates and times have no JSON form; such configs go uncached
+            data = json.dumps({"key": key, "config": config})
+            cache_path.write_text(data)
+        except (OSError, TypeError, ValueError):
+            pass
+    return config
 
 
 def resolve(cli_value: Any, config_value: Any, default: Any) -> Any:
@@ -1,10 +1,43 @@
 """Track the working directory of the child shell process."""
 
+import ctypes
 import os
 import subprocess
 import sys
 import time
 
+# macOS: read the cwd straight from the kernel with proc_pidinfo() instead of
+# spawning lsof. Struct layouts follow <sys/proc_info.h>.
+_PROC_PIDVNODEPATHINFO = 9
+_VNODE_INFO_SIZE = 152  # sizeof(struct vnode_info)
+_MAXPATHLEN = 1024
+
+
+class _VnodeInfoPath(ctypes.Structure):
+    _fields_ = [
+        ("vip_vi", ctypes.c_char * _VNODE_INFO_SIZE),
+        ("vip_path", ctypes.c_char * _MAXPATHLEN),
+    ]
+
+
+class _ProcVnodePathInfo(ctypes.Structure):
+    _fields_ = [
+        ("pvi_cdir", _VnodeInfoPath),
+        ("pvi_rdir", _VnodeInfoPath),
+    ]
+
+
+_libproc = None
+if sys.platform == "darwin":
+    try:
+        _libproc = ctypes.CDLL("/usr/lib/libproc.dylib")
+        _libproc.proc_pidinfo.argtypes = [
+            ctypes.c_int, ctypes.c_int, ctypes.c_uint64, ctypes.c_void_p, ctypes.c_int,
+        ]
+        _libproc.proc_pidinfo.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _libproc = None
+
 
 class CwdTracker:
     """Cross-platform cwd tracking for a child process."""
@@ -14,6 +47,12 @@ class CwdTracker:
         self._cached_cwd: str | None = None
         self._cache_time: float = 0.0
         self._cache_ttl = 1.0  # seconds
+        # readlink and proc_pidinfo are single syscalls: call them directly
+        # every time. Only the lsof fallback is slow enough to need the cache.
+        if sys.platform == "linux":
+            self.get_cwd = self._read_cwd_linux
+        elif sys.platform == "darwin" and _libproc is not None:
+            self.get_cwd = self._read_cwd_macos
 
     def get_cwd(self) -> str | None:
         """Return the child process's current working directory, or None on failure."""
@@ -41,6 +80,17 @@ class CwdTracker:
             return None
 
     def _read_cwd_macos(self) -> str | None:
+        if _libproc is not None:
+            info = _ProcVnodePathInfo()
+            size = ctypes.sizeof(info)
+            written = _libproc.proc_pidinfo(
+                self._pid, _PROC_PIDVNODEPATHINFO, 0, ctypes.byref(info), size
+            )
+            if written == size and info.pvi_cdir.vip_path:
+                return os.fsdecode(info.pvi_cdir.vip_path)
+        return self._read_cwd_lsof()
+
+    def _read_cwd_lsof(self) -> str | None:
         try:
             result = subprocess.run(
                 ["lsof", "-p", str(self._pid), "-Fn"],
@@ -1,5 +1,7 @@
 """Auto-discover running OpenAI-compatible LLM servers."""
 
+import asyncio
+
 import httpx
 
 # (port, label) pairs to scan
@@ -14,21 +16,32 @@ KNOWN_SERVERS = [
 SCAN_TIMEOUT = 1.0  # seconds per probe
 
 
-async def probe_server(base_url: str) -> bool:
+_PROBE_ERRORS = (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError)
+
+
+async def probe_server(client: httpx.AsyncClient, base_url: str) -> bool:
     """Check if an OpenAI-compatible server is responding at base_url."""
-    async with httpx.AsyncClient(timeout=SCAN_TIMEOUT) as client:
-        try:
-            resp = await client.get(f"{base_url}/v1/models")
-            return resp.status_code == 200
-        except (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError):
-            return False
+    try:
+        resp = await client.get(f"{base_url}/v1/models")
+    except _PROBE_ERRORS:
+        return False
+    return resp.status_code == 200
 
 
 async def discover_servers() -> list[tuple[str, str]]:
-    """Scan known ports and return list of (base_url, label) for responding servers."""
-    found = []
-    for port, label in KNOWN_SERVERS:
-        base_url = f"http://localhost:{port}"
-        if await probe_server(base_url):
-            found.append((base_url, label))
-    return found
+    """Scan known ports and return list of (base_url, label) for responding servers.
+
+    All ports are probed concurrently, so a scan takes at most ~SCAN_TIMEOUT.
+    """
+    candidates = [(f"http://localhost:{port}", label) for port, label in KNOWN_SERVERS]
+    # One client for the whole scan; the pool is sized so every connect runs at once
+    async with httpx.AsyncClient(
+        timeout=SCAN_TIMEOUT,
+        limits=httpx.Limits(max_connections=len(candidates)),
+    ) as client:
+        results = await asyncio.gather(
+            *(probe_server(client, base_url) for base_url, _label in candidates),
+            return_exceptions=True,
+        )
+    # Probes that raised come back as exceptions — only a literal True counts
+    return [candidate for candidate, ok in zip(candidates, results) if ok is True]
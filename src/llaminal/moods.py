@@ -45,4 +45,5 @@ MOODS: dict[str, str] = {
     ),
 }
 
-MOOD_NAMES = sorted(MOODS.keys())
+# Sorted names for --mood; keep in step with MOODS
+MOOD_NAMES = ("concise", "eli5", "pirate", "poet", "rubber-duck", "senior-engineer")
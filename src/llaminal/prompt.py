@@ -0,0 +1,22 @@
+"""Confirmation prompts that wait on the event loop instead of blocking it."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+# Installed by the shell wrapper, which owns stdin while it runs
+_line_reader: Callable[[], Awaitable[str]] | None = None
+
+
+def set_line_reader(reader: Callable[[], Awaitable[str]] | None) -> None:
+    """Route prompts through reader, which awaits one line from the terminal."""
+    global _line_reader
+    _line_reader = reader
+
+
+async def ask(prompt: str) -> str:
+    """Show prompt and return the line the user types, like input()."""
+    if _line_reader is None:
+        # Nothing else is reading stdin: a blocking read on a worker is safe
+        return await asyncio.to_thread(input, prompt)
+    print(prompt, end="", flush=True)
+    return await _line_reader()
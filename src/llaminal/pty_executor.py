@@ -5,13 +5,27 @@ import os
 import re
 import sys
 
+from llaminal.prompt import ask
+
+# Marker line printed after each command: ___LLAMINAL_DONE_<id>_<exit code>___
+# The PTY's line discipline turns \n into \r\n, so allow the \r.
+_MARKER_RE = re.compile(rb"^___LLAMINAL_DONE_([0-9a-f]+)_(\d+)___\r?$", re.MULTILINE)
+
+# _format_result only keeps the first and last 5K characters, so once a
+# command's output outgrows the head + tail window the middle is dropped as it
+# arrives instead of being buffered until the marker shows up.
+_CAPTURE_HEAD = 8 * 1024
+_CAPTURE_TAIL = 24 * 1024
+_TRUNCATED = b"\n... (output truncated) ...\n"
+
 
 class PtyExecutor:
     """Executes commands by writing them into the PTY and capturing output via markers."""
 
-    def __init__(self, shell_wrapper, scrollback):
+    def __init__(self, shell_wrapper, scrollback, cwd_provider=None):
         self._wrapper = shell_wrapper
         self._scrollback = scrollback
+        self._cwd_provider = cwd_provider
         self._counter = 0
 
     async def execute(self, command: str, timeout: float = 30.0) -> str:
@@ -23,16 +37,14 @@ class PtyExecutor:
         # Confirmation prompt (we're already in cooked mode during agent loop)
         cwd_info = ""
         try:
-            from llaminal.cwd_tracker import CwdTracker
-            tracker = CwdTracker(self._wrapper.child_pid)
-            cwd = tracker.get_cwd()
+            cwd = self._cwd_provider() if self._cwd_provider else None
             if cwd:
                 cwd_info = f"\n  Working directory: {cwd}"
         except Exception:
             pass
 
         print(f"\n  Command: {command}{cwd_info}")
-        answer = input("  Execute? [y/N] ").strip().lower()
+        answer = (await ask("  Execute? [y/N] ")).strip().lower()
         if answer != "y":
             return "Command execution cancelled by user."
 
@@ -40,9 +52,7 @@ class PtyExecutor:
         self._counter += 1
         marker_id = f"{os.getpid():x}{self._counter:x}"
         marker = f"___LLAMINAL_DONE_{marker_id}"
-        marker_pattern = re.compile(
-            rf"^{re.escape(marker)}_(\d+)___$", re.MULTILINE
-        )
+        marker_id_bytes = marker_id.encode()
 
         # Build the command string with marker
         # Semicolon ensures marker runs even if command fails
@@ -52,18 +62,30 @@ class PtyExecutor:
         # Set up capture
         loop = asyncio.get_running_loop()
         result_future: asyncio.Future[tuple[str, int]] = loop.create_future()
-        capture_buf: list[bytes] = []
-
-        def capture_callback(data: bytes) -> None:
-            capture_buf.append(data)
-            # Check if marker has appeared in accumulated output
-            accumulated = b"".join(capture_buf).decode("utf-8", errors="replace")
-            match = marker_pattern.search(accumulated)
-            if match and not result_future.done():
-                exit_code = int(match.group(1))
+        capture_buf = bytearray()
+        # Only rescan the new bytes plus enough overlap for a split marker line
+        scan_from = 0
+        overlap = len(marker) + 32
+
+        def capture_callback(data: bytes | memoryview) -> None:
+            nonlocal scan_from
+            capture_buf.extend(data)
+            if result_future.done():
+                return
+            match = _MARKER_RE.search(capture_buf, scan_from)
+            # Skip markers left over from an earlier (timed-out) command
+            while match and match.group(1) != marker_id_bytes:
+                match = _MARKER_RE.search(capture_buf, match.end())
+            if match:
+                exit_code = int(match.group(2))
                 # Extract output between command echo and marker
-                output = _extract_output(accumulated, command, marker, match)
+                output = _extract_output(capture_buf, match)
                 result_future.set_result((output, exit_code))
+            else:
+                excess = len(capture_buf) - _CAPTURE_TAIL
+                if excess > _CAPTURE_HEAD + len(_TRUNCATED):
+                    capture_buf[_CAPTURE_HEAD:excess] = _TRUNCATED
+                scan_from = max(0, len(capture_buf) - overlap)
 
         # Register capture callback and enable PTY output display
         self._wrapper.add_master_output_callback(capture_callback)
@@ -82,8 +104,7 @@ class PtyExecutor:
                 # Timeout — send Ctrl+C to interrupt
                 self._wrapper.write_to_shell(b"\x03")
                 await asyncio.sleep(0.2)  # brief pause for interrupt to process
-                accumulated = b"".join(capture_buf).decode("utf-8", errors="replace")
-                output = _extract_output_raw(accumulated, command)
+                output = _extract_output_raw(capture_buf)
                 return _format_result(output, -1, timed_out=True, timeout_secs=timeout)
 
         finally:
@@ -97,12 +118,10 @@ class PtyExecutor:
         return _format_result(output, exit_code)
 
 
-def _extract_output(
-    accumulated: str, command: str, marker: str, match: re.Match
-) -> str:
+def _extract_output(accumulated: bytearray, match: re.Match) -> str:
     """Extract command output between the echoed command and the marker."""
     # Find end of the echoed command line (first newline after command appears)
-    cmd_end = accumulated.find("\n")
+    cmd_end = accumulated.find(b"\n")
     if cmd_end == -1:
         cmd_end = 0
     else:
@@ -111,22 +130,21 @@ def _extract_output(
     # Output is everything from after the echo to before the marker line
     marker_start = match.start()
     # Walk back to the start of the marker line
-    line_start = accumulated.rfind("\n", 0, marker_start)
+    line_start = accumulated.rfind(b"\n", 0, marker_start)
     if line_start == -1:
         line_start = 0
     else:
         line_start += 1
 
-    output = accumulated[cmd_end:line_start].strip()
-    return output
+    # Decode once, now that the full output is known
+    return accumulated[cmd_end:line_start].decode("utf-8", errors="replace").strip()
 
 
-def _extract_output_raw(accumulated: str, command: str) -> str:
+def _extract_output_raw(accumulated: bytearray) -> str:
     """Extract whatever output we have (for timeout case)."""
-    cmd_end = accumulated.find("\n")
-    if cmd_end == -1:
-        return accumulated.strip()
-    return accumulated[cmd_end + 1 :].strip()
+    cmd_end = accumulated.find(b"\n")
+    output = accumulated if cmd_end == -1 else accumulated[cmd_end + 1 :]
+    return output.decode("utf-8", errors="replace").strip()
 
 
 def _format_result(
@@ -1,9 +1,11 @@
 """Rich-based rendering for assistant output, tool calls, and errors."""
 
-import threading
+import asyncio
+import functools
+import io
 import time
 
-from rich.console import Console
+from rich.console import Console, RenderableType
 from rich.live import Live
 from rich.markdown import Markdown
 from rich.panel import Panel
@@ -13,76 +15,129 @@ from llaminal.themes import get_theme
 
 console = Console()
 
+
+def set_console_size(rows: int, cols: int) -> None:
+    """Pin the console to the terminal size so frames don't re-query it.
+
+    Without an explicit size, every Live refresh and print asks the OS for the
+    terminal size; the shell's resize callback keeps this current instead.
+    A pty reporting 0x0 is left to rich's own detection and 80x25 fallback.
+    """
+    if rows > 0 and cols > 0:
+        console.size = (cols, rows)
+
+
 LLAMA = "\U0001f999"  # 🦙
 DOT_TRAIL = "." * 3
+FRAME_INTERVAL = 1 / 60  # seconds; streamed tokens redraw at most once per frame
+THINKING_INTERVAL = 0.5  # seconds per thinking-animation frame
 
 
 class StreamRenderer:
     """Streams tokens via Rich Live, with a llama thinking animation before first token."""
 
     def __init__(self, show_stats: bool = False) -> None:
-        self._text = ""
+        self._buf = io.StringIO()
         self._token_count = 0
         self._first_token = False
         self._show_stats = show_stats
         self._start_time: float = 0.0
         self._first_token_time: float = 0.0
+        # Tokens are appended to self._buf (raw text) and to one live Text
+        # that becomes the frame on the first token. Live pulls the current
+        # frame on each refresh, so nothing is copied or rebuilt per redraw.
+        self._live_text = Text()
+        self._frame: RenderableType = Text("")
+        # No refresh thread: update() redraws as soon as a token lands, unless
+        # the last redraw was under a frame ago — then one trailing redraw is
+        # scheduled on the event loop to pick up everything that arrived.
         self._live = Live(
-            Text(""),
             console=console,
-            refresh_per_second=10,
+            auto_refresh=False,
             vertical_overflow="visible",
+            get_renderable=self._get_renderable,
         )
-        self._thinking_stop = threading.Event()
-        self._thinking_thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._last_refresh = 0.0
+        self._pending_refresh: asyncio.TimerHandle | None = None
+        # Thinking animation runs as a timer on the event loop
+        self._thinking_step = 0
+        self._thinking_handle: asyncio.TimerHandle | None = None
 
     def start(self) -> None:
         self._start_time = time.monotonic()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
         self._live.start()
-        self._thinking_stop.clear()
-        self._thinking_thread = threading.Thread(target=self._animate_thinking, daemon=True)
-        self._thinking_thread.start()
-
-    def _animate_thinking(self) -> None:
-        """Animate the llama eating dots left-to-right (pac-man style)."""
-        trail = DOT_TRAIL
-        width = len(trail)
-        while not self._thinking_stop.is_set():
-            for i in range(width + 1):
-                if self._thinking_stop.is_set():
-                    return
-                dots = trail[: width - i]
-                padding = " " * i
-                frame = Text()
-                frame.append("[", style="dim")
-                frame.append(dots, style="green")
-                frame.append(LLAMA)
-                frame.append(padding)
-                frame.append("]", style="dim")
-                self._live.update(frame)
-                time.sleep(0.50)
+        self._thinking_step = 0
+        self._tick_thinking()
+
+    def _refresh(self) -> None:
+        self._pending_refresh = None
+        self._live.refresh()
+        # Stamp after the write: on a slow terminal a redraw can take longer
+        # than a frame, and the next one should still wait a full frame
+        # rather than firing back-to-back and starving the stream.
+        self._last_refresh = time.monotonic()
+
+    def _cancel_pending_refresh(self) -> None:
+        if self._pending_refresh is not None:
+            self._pending_refresh.cancel()
+            self._pending_refresh = None
+
+    def _get_renderable(self) -> RenderableType:
+        """Return what Live should draw on its next refresh."""
+        return self._frame
+
+    def _tick_thinking(self) -> None:
+        """Draw the next frame of the llama eating dots left-to-right (pac-man style)."""
+        width = len(DOT_TRAIL)
+        i = self._thinking_step
+        self._thinking_step = (i + 1) % (width + 1)
+        frame = Text()
+        frame.append("[", style="dim")
+        frame.append(DOT_TRAIL[: width - i], style="green")
+        frame.append(LLAMA)
+        frame.append(" " * i)
+        frame.append("]", style="dim")
+        self._frame = frame
+        self._live.refresh()
+        if self._loop is not None:
+            self._thinking_handle = self._loop.call_later(THINKING_INTERVAL, self._tick_thinking)
 
     def _stop_thinking(self) -> None:
         """Stop the thinking animation."""
-        if self._thinking_thread and self._thinking_thread.is_alive():
-            self._thinking_stop.set()
-            self._thinking_thread.join(timeout=0.5)
-            self._thinking_thread = None
+        if self._thinking_handle is not None:
+            self._thinking_handle.cancel()
+            self._thinking_handle = None
 
     def update(self, token: str) -> None:
         if not self._first_token:
             self._stop_thinking()
             self._first_token = True
             self._first_token_time = time.monotonic()
-        self._text += token
+            self._frame = self._live_text
+        self._buf.write(token)
+        self._live_text.append(token)
         self._token_count += 1
-        self._live.update(Text(self._text))
+
+        if self._pending_refresh is not None:
+            return  # a redraw is already due at the end of this frame
+        wait = self._last_refresh + FRAME_INTERVAL - time.monotonic()
+        if wait <= 0 or self._loop is None:
+            self._refresh()
+        else:
+            self._pending_refresh = self._loop.call_later(wait, self._refresh)
 
     def finalize(self) -> None:
         """Replace streamed text with rendered Markdown, then stop."""
         self._stop_thinking()
-        if self._text.strip():
-            self._live.update(Markdown(self._text))
+        self._cancel_pending_refresh()
+        text = self._buf.getvalue()
+        if text.strip():
+            self._frame = _markdown(text)
         self._live.stop()
         self._print_stats()
 
@@ -100,17 +155,24 @@ class StreamRenderer:
     def stop(self) -> None:
         """Stop without markdown render (for interruptions)."""
         self._stop_thinking()
+        self._cancel_pending_refresh()
         self._live.stop()
 
     def get_text(self) -> str:
-        return self._text
+        return self._buf.getvalue()
+
+
+@functools.lru_cache(maxsize=8)
+def _markdown(text: str) -> Markdown:
+    """Parse markdown once per distinct text; Markdown parses in its constructor."""
+    return Markdown(text)
 
 
 def render_assistant(text: str) -> None:
     """Render assistant response as markdown."""
     if not text.strip():
         return
-    console.print(Markdown(text))
+    console.print(_markdown(text))
 
 
 def render_tool_call(name: str, args: dict) -> None:
@@ -135,4 +197,6 @@ def render_tool_result(result: str) -> None:
 def render_error(msg: str) -> None:
     """Render an error message in red."""
     theme = get_theme()
-    console.print(f"[{theme.error}]Error:[/{theme.error}] {msg}")
+    # Styled spans instead of markup: the message (often server response
+    # text) is emitted as-is without going through the markup parser
+    console.print(Text.assemble(("Error:", theme.error), " ", msg))
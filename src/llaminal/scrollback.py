@@ -1,81 +1,117 @@
 """Scrollback capture — pyte HistoryScreen for rolling terminal history."""
 
+import asyncio
+import codecs
+import operator
 import re
+from collections import deque
+from collections.abc import Iterator
 
 import pyte
 
-# Patterns that indicate progress bar / download lines
-_PROGRESS_PATTERNS = [
-    re.compile(r"\[#+"),           # [####
-    re.compile(r"\d+%\s*\|[=▮█]"),  # 50% |===  or 50% |▮▮▮
-    re.compile(r"\d+%\s*━"),       # rich-style progress
-    re.compile(r"Downloading.*\d+%"),
-    re.compile(r"Uploading.*\d+%"),
-    re.compile(r"\r.*\d+%"),       # carriage-return progress
-]
+# Patterns that indicate progress bar / download lines, as one alternation so
+# each line costs a single regex search
+_PROGRESS_RE = re.compile(
+    r"\[#+"                 # [####
+    r"|\d+%\s*\|[=▮█]"      # 50% |===  or 50% |▮▮▮
+    r"|\d+%\s*━"            # rich-style progress
+    r"|Downloading.*\d+%"
+    r"|Uploading.*\d+%"
+    r"|\r.*\d+%"            # carriage-return progress
+)
 
 
 def _is_progress_line(line: str) -> bool:
-    return any(p.search(line) for p in _PROGRESS_PATTERNS)
+    # Every pattern needs a literal "%" or "[#"; plain `in` checks rule out
+    # ordinary lines without running the regex at all
+    if "%" not in line and "[#" not in line:
+        return False
+    return _PROGRESS_RE.search(line) is not None
 
 
-def _compress(lines: list[str]) -> list[str]:
-    """Apply smart compression to scrollback lines."""
-    result: list[str] = []
-
-    # 1. Collapse progress bar runs
-    i = 0
-    while i < len(lines):
-        if _is_progress_line(lines[i]):
-            first = lines[i]
-            j = i + 1
-            while j < len(lines) and _is_progress_line(lines[j]):
-                j += 1
-            count = j - i
-            last = lines[j - 1]
-            if count > 2:
-                result.append(first)
-                result.append(f"... ({count - 2} lines of progress output) ...")
-                result.append(last)
-            else:
-                result.extend(lines[i:j])
-            i = j
-        else:
-            result.append(lines[i])
-            i += 1
-
-    # 2. Truncate large output blocks (>80 consecutive non-blank lines)
-    compressed: list[str] = []
-    i = 0
-    while i < len(result):
-        if result[i]:  # non-blank
-            block_start = i
-            while i < len(result) and result[i]:
-                i += 1
-            block_len = i - block_start
-            if block_len > 80:
-                compressed.extend(result[block_start : block_start + 20])
-                compressed.append(f"... ({block_len - 40} lines truncated) ...")
-                compressed.extend(result[i - 20 : i])
-            else:
-                compressed.extend(result[block_start:i])
-        else:
-            compressed.append(result[i])
-            i += 1
+_GET_DATA = operator.attrgetter("data")
+
+# Shell output is buffered raw and run through pyte in batches: once output
+# pauses for _FLUSH_DELAY, when this much has piled up, or when context is
+# requested — instead of once per PTY read
+_PENDING_LIMIT = 64 * 1024
+_FLUSH_DELAY = 0.1  # seconds
+
+_BLOCK_MAX = 80   # non-blank blocks longer than this get truncated...
+_BLOCK_KEEP = 20  # ...to this many lines at each end
+
+
+def _collapse_progress(lines: list[str]) -> Iterator[str]:
+    """Yield lines with runs of 3+ progress lines reduced to first/summary/last."""
+    first = last = ""
+    count = 0
+    for line in lines:
+        if _is_progress_line(line):
+            if not count:
+                first = line
+            last = line
+            count += 1
+            continue
+        if count:
+            yield from _progress_run(first, last, count)
+            count = 0
+        yield line
+    if count:
+        yield from _progress_run(first, last, count)
+
 
-    # 3. Dedup blank line runs
-    final: list[str] = []
+def _progress_run(first: str, last: str, count: int) -> tuple[str, ...]:
+    if count > 2:
+        return (first, f"... ({count - 2} lines of progress output) ...", last)
+    return (first, last) if count == 2 else (first,)
+
+
+def _emit_block(out: list[str], block: list[str], tail: deque[str], block_len: int) -> None:
+    out.extend(block)
+    if block_len > _BLOCK_MAX:
+        out.append(f"... ({block_len - 2 * _BLOCK_KEEP} lines truncated) ...")
+        out.extend(tail)
+
+
+def _compress(lines: list[str]) -> list[str]:
+    """Apply smart compression to scrollback lines in a single pass.
+
+    Progress bar runs collapse, non-blank blocks over 80 lines keep only their
+    first and last 20, and runs of blank lines are deduplicated.
+    """
+    out: list[str] = []
+    # Lines of the current non-blank block; once it outgrows _BLOCK_MAX only the
+    # head stays here and the last _BLOCK_KEEP lines ride in `tail`
+    block: list[str] = []
+    tail: deque[str] = deque(maxlen=_BLOCK_KEEP)
+    block_len = 0
     prev_blank = False
-    for line in compressed:
-        if not line:
-            if not prev_blank:
-                final.append(line)
-            prev_blank = True
-        else:
+
+    for line in _collapse_progress(lines):
+        if line:
+            block_len += 1
+            if block_len <= _BLOCK_MAX:
+                block.append(line)
+            else:
+                if block_len == _BLOCK_MAX + 1:
+                    tail.extend(block[-_BLOCK_KEEP:])
+                    del block[_BLOCK_KEEP:]
+                tail.append(line)
+            continue
+
+        if block_len:
+            _emit_block(out, block, tail, block_len)
+            block.clear()
+            tail.clear()
+            block_len = 0
             prev_blank = False
-            final.append(line)
+        if not prev_blank:
+            out.append(line)
+        prev_blank = True
 
-    return final
+    if block_len:
+        _emit_block(out, block, tail, block_len)
+    return out
 
 
 class ScrollbackCapture:
@@ -87,26 +123,64 @@ class ScrollbackCapture:
         self._screen = pyte.HistoryScreen(cols, rows, history=history_size)
         self._screen.set_mode(pyte.modes.LNM)
         self._stream = pyte.Stream(self._screen)
-
-    def feed(self, data: bytes) -> None:
-        """Feed raw bytes from master_fd output into the pyte screen."""
+        # (max_lines, text) from the last get_context; cleared by feed/resize
+        self._context_cache: tuple[int, str | None] | None = None
+        self._pending = bytearray()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Carries a multi-byte character split across batches into the next one
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, data: bytes | memoryview) -> None:
+        """Queue raw bytes from master_fd output for the pyte screen."""
+        self._context_cache = None
+        self._pending += data
+        if len(self._pending) >= _PENDING_LIMIT:
+            self._flush()
+        elif self._flush_handle is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._flush()
+                return
+            self._flush_handle = loop.call_later(_FLUSH_DELAY, self._flush)
+
+    def _flush(self) -> None:
+        """Run queued output through pyte in one go."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        data, self._pending = self._pending, bytearray()
         try:
-            self._stream.feed(data.decode("utf-8", errors="replace"))
+            self._stream.feed(self._decoder.decode(data))
         except Exception:
             pass
 
     def resize(self, rows: int, cols: int) -> None:
         """Update screen dimensions (called on SIGWINCH)."""
+        self._flush()  # earlier output was laid out at the old size
         self._cols = cols
         self._rows = rows
         self._screen.resize(rows, cols)
+        self._context_cache = None
 
     def get_context(self, max_lines: int = 200) -> str | None:
         """Extract scrollback history + visible screen as context text.
 
         Applies smart compression (progress bar collapse, large block truncation,
-        blank line dedup) then caps at `max_lines` from the bottom.
+        blank line dedup) then caps at `max_lines` from the bottom. The result
+        is reused until the screen changes.
         """
+        cache = self._context_cache
+        if cache is not None and cache[0] == max_lines:
+            return cache[1]
+        text = self._build_context(max_lines)
+        self._context_cache = (max_lines, text)
+        return text
+
+    def _build_context(self, max_lines: int) -> str | None:
+        self._flush()
         lines = self._history_lines() + self._screen_lines()
 
         # Trim trailing empty lines
@@ -128,13 +202,12 @@ class ScrollbackCapture:
 
     def _history_lines(self) -> list[str]:
         """Extract text lines from scrolled-off history."""
-        result = []
-        for row in self._screen.history.top:
-            line = "".join(
-                row[col].data for col in range(self._cols)
-            ).rstrip()
-            result.append(line)
-        return result
+        # map() keeps the per-cell lookup and .data access in C
+        cols = range(self._cols)
+        return [
+            "".join(map(_GET_DATA, map(row.__getitem__, cols))).rstrip()
+            for row in self._screen.history.top
+        ]
 
     def _screen_lines(self) -> list[str]:
         """Extract text lines from the visible screen."""
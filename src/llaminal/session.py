@@ -16,11 +16,15 @@ Be concise and direct in your responses.\
 class Session:
     """Manages the conversation message history in OpenAI message format."""
 
-    def __init__(self, system_prompt: str | None = None):
+    def __init__(self, system_prompt: str | None = None, max_messages: int | None = None):
         self.messages: list[dict] = [
             {"role": "system", "content": system_prompt or SYSTEM_PROMPT}
         ]
+        # Most recent messages sent per request (besides the system prompt);
+        # None sends the whole history. self.messages always keeps everything.
+        self.max_messages = max_messages
         self._shell_context: str | None = None
+        self._shell_cwd: str | None = None
 
     def set_shell_context(self, text: str, cwd: str | None = None) -> None:
         """Set terminal context to be prepended to the next user message."""
@@ -28,14 +32,19 @@ class Session:
         self._shell_cwd = cwd
 
     def add_user(self, content: str) -> None:
-        prefix_parts = []
-        if hasattr(self, "_shell_cwd") and self._shell_cwd:
-            prefix_parts.append(f"[Working directory: {self._shell_cwd}]")
-        if self._shell_context:
-            prefix_parts.append(f"[Recent terminal output]\n{self._shell_context}")
-        if prefix_parts:
-            prefix = "\n".join(prefix_parts)
-            content = f"{prefix}\n\n{content}"
+        cwd = self._shell_cwd
+        context = self._shell_context
+        if cwd or context:
+            # Assemble the prefixed message with a single join
+            pieces: list[str] = []
+            if cwd:
+                pieces += ("[Working directory: ", cwd, "]")
+            if context:
+                if cwd:
+                    pieces.append("\n")
+                pieces += ("[Recent terminal output]\n", context)
+            pieces += ("\n\n", content)
+            content = "".join(pieces)
             self._shell_context = None
             self._shell_cwd = None
         self.messages.append({"role": "user", "content": content})
@@ -57,5 +66,29 @@ class Session:
             "content": content,
         })
 
+    def rollback_last_user(self) -> bool:
+        """Remove the last message if it is a user message, so the user can retry.
+
+        Returns True if a message was removed.
+        """
+        messages = self.messages
+        if messages and messages[-1]["role"] == "user":
+            messages.pop()
+            return True
+        return False
+
     def get_messages(self) -> list[dict]:
-        return self.messages
+        """Return the messages to send — callers must not mutate the result.
+
+        Within max_messages this is the live list (not a copy); beyond it, the
+        system prompt plus a window of the most recent messages.
+        """
+        messages = self.messages
+        limit = self.max_messages
+        if limit is None or len(messages) - 1 <= limit:
+            return messages
+        start = len(messages) - limit
+        # Never open the window on tool results whose tool_calls were cut off
+        while start < len(messages) and messages[start]["role"] == "tool":
+            start += 1
+        return [messages[0], *messages[start:]]
@@ -4,6 +4,7 @@ import asyncio
 import fcntl
 import os
 import pty
+import select
 import signal
 import struct
 import sys
@@ -11,6 +12,17 @@ import termios
 import tty
 
 
+# Bytes per os.read, and the most reads drained from the PTY per wakeup (so a
+# flood of output can't starve stdin)
+_READ_SIZE = 65536
+_MAX_DRAIN_READS = 16
+
+# Escape detector states (index into ShellWrapper._esc_handlers)
+_IDLE = 0
+_ESC_PENDING = 1
+_DOUBLE_ESC = 2
+
+
 class ShellWrapper:
     """Spawns the user's $SHELL in a PTY and proxies I/O through asyncio."""
 
@@ -18,14 +30,21 @@ class ShellWrapper:
         self._shell = shell or os.environ.get("SHELL", "/bin/sh")
         self._master_fd: int = -1
         self._child_pid: int = -1
+        self._exit_code: int | None = None  # shell's exit status once reaped
+        # Looked up once in spawn(); the I/O callbacks use them on every event
+        self._stdin_fd: int = -1
+        self._stdout_fd: int = -1
         self._original_termios: list | None = None
         self._loop: asyncio.AbstractEventLoop | None = None
-        self._running = False
+        self._exit_event: asyncio.Event | None = None  # set when the shell is done
+        # PTY output is drained into this one preallocated buffer (no bytes
+        # object per read); callbacks get a memoryview valid for the call only
+        self._read_view = memoryview(bytearray(_READ_SIZE * _MAX_DRAIN_READS))
 
         # Escape detection state machine (3-state)
         # IDLE → ESC_PENDING (300ms) → DOUBLE_ESC (200ms shortcut window)
-        self._esc_pending = False
-        self._double_esc_pending = False
+        self._esc_state = _IDLE
+        self._esc_handlers = (self._scan_idle, self._scan_esc_pending, self._scan_double_esc)
         self._esc_timer: asyncio.TimerHandle | None = None
         self._shortcut_timer: asyncio.TimerHandle | None = None
         self._ESC_TIMEOUT = 0.3  # 300ms for single ESC
@@ -51,6 +70,11 @@ class ShellWrapper:
     def child_pid(self) -> int:
         return self._child_pid
 
+    @property
+    def exit_code(self) -> int | None:
+        """The shell's exit code (negative signal number if killed), once reaped."""
+        return self._exit_code
+
     @property
     def ai_mode(self) -> bool:
         return self._ai_mode
@@ -135,12 +159,17 @@ class ShellWrapper:
             # Parent process
             os.close(slave_fd)
             self._child_pid = pid
+            # Non-blocking so _on_master_ready can drain until EAGAIN
+            os.set_blocking(self._master_fd, False)
+
+            self._stdin_fd = sys.stdin.fileno()
+            self._stdout_fd = sys.stdout.fileno()
 
             # Save original terminal settings and enter raw mode
-            self._original_termios = termios.tcgetattr(sys.stdin.fileno())
-            tty.setraw(sys.stdin.fileno())
+            self._original_termios = termios.tcgetattr(self._stdin_fd)
+            tty.setraw(self._stdin_fd)
 
-    def _handle_sigwinch(self, signum, frame) -> None:
+    def _handle_sigwinch(self) -> None:
         """Forward terminal resize to the PTY child."""
         rows, cols = self._get_terminal_size()
         self._set_pty_size(rows, cols)
@@ -157,24 +186,38 @@ class ShellWrapper:
             except Exception:
                 pass
 
-    def _handle_sigchld(self, signum, frame) -> None:
-        """Detect child exit."""
+    def _stop(self) -> None:
+        """Mark the shell as finished and wake run()."""
+        if self._exit_event is not None:
+            self._exit_event.set()
+
+    def _reap(self) -> bool:
+        """Collect the shell's exit status if it has exited; True once it's gone."""
         try:
             pid, status = os.waitpid(self._child_pid, os.WNOHANG)
-            if pid == self._child_pid:
-                self._running = False
         except ChildProcessError:
-            self._running = False
+            return True
+        if pid != self._child_pid:
+            return False
+        self._exit_code = os.waitstatus_to_exitcode(status)
+        return True
+
+    def _handle_sigchld(self) -> None:
+        """Detect child exit."""
+        if self._reap():
+            self._stop()
 
     def _on_stdin_ready(self) -> None:
         """Handle data available on stdin."""
         try:
-            data = os.read(sys.stdin.fileno(), 4096)
+            # stdin is the user's tty and stays blocking (its flags are shared
+            # with the parent shell), so one large read instead of a drain
+            data = os.read(self._stdin_fd, _READ_SIZE)
         except OSError:
             return
 
         if not data:
-            self._running = False
+            self._stop()
             return
 
         if self._ai_mode:
@@ -198,47 +241,54 @@ class ShellWrapper:
         DOUBLE_ESC --[timeout]--> enter AI mode, IDLE
         DOUBLE_ESC --[other]--> enter AI mode, IDLE
         """
-        i = 0
-        while i < len(data):
-            byte = data[i : i + 1]
-            i += 1
-
-            if self._double_esc_pending:
-                # In DOUBLE_ESC state — check for shortcut key
-                self._cancel_shortcut_timer()
-                self._double_esc_pending = False
-                if byte == b"f" and self._fix_it_callback:
-                    self._fix_it_callback()
-                    return
-                elif byte == b"e" and self._explain_it_callback:
-                    self._explain_it_callback()
-                    return
-                else:
-                    # Not a shortcut — enter normal AI mode
-                    self._enter_ai_mode()
-                    return
-            elif byte == b"\x1b":
-                if self._esc_pending:
-                    # Second ESC within timeout → enter DOUBLE_ESC state
-                    self._cancel_esc_timer()
-                    self._esc_pending = False
-                    self._double_esc_pending = True
-                    self._start_shortcut_timer()
-                    # Check if there are more bytes to consume for shortcut
-                else:
-                    # First ESC → start timer
-                    self._esc_pending = True
-                    self._start_esc_timer()
-            else:
-                if self._esc_pending:
-                    # Non-ESC byte while waiting → forward the pending ESC + this byte
-                    self._cancel_esc_timer()
-                    self._esc_pending = False
-                    remaining = b"\x1b" + data[i - 1 :]
-                    self._write_to_master(remaining)
-                    return
-                else:
-                    self._write_to_master(byte)
+        # Each state's handler consumes input from pos and returns where the
+        # next state should pick up
+        handlers = self._esc_handlers
+        pos = 0
+        end = len(data)
+        while pos < end:
+            pos = handlers[self._esc_state](data, pos)
+
+    def _scan_idle(self, data: bytes, pos: int) -> int:
+        """IDLE: pass everything up to the next ESC through in one write."""
+        esc = data.find(b"\x1b", pos)
+        if esc == -1:
+            self._write_to_master(data[pos:] if pos else data)
+            return len(data)
+        if esc > pos:
+            self._write_to_master(data[pos:esc])
+        # First ESC → start timer
+        self._esc_state = _ESC_PENDING
+        self._start_esc_timer()
+        return esc + 1
+
+    def _scan_esc_pending(self, data: bytes, pos: int) -> int:
+        """ESC_PENDING: a second ESC arms the shortcut window, anything else flushes."""
+        self._cancel_esc_timer()
+        if data[pos] == 0x1B:
+            # Second ESC within timeout → enter DOUBLE_ESC state; the next
+            # byte may be a shortcut key
+            self._esc_state = _DOUBLE_ESC
+            self._start_shortcut_timer()
+            return pos + 1
+        # Non-ESC byte while waiting → forward the pending ESC + the rest
+        self._esc_state = _IDLE
+        self._write_many_to_master((b"\x1b", data[pos:]))
+        return len(data)
+
+    def _scan_double_esc(self, data: bytes, pos: int) -> int:
+        """DOUBLE_ESC: check for a shortcut key, otherwise enter AI mode."""
+        byte = data[pos]
+        self._cancel_shortcut_timer()
+        self._esc_state = _IDLE
+        if byte == 0x66 and self._fix_it_callback:  # "f"
+            self._fix_it_callback()
+        elif byte == 0x65 and self._explain_it_callback:  # "e"
+            self._explain_it_callback()
+        else:
+            # Not a shortcut — enter normal AI mode
+            self._enter_ai_mode()
+        return len(data)
 
     def _start_esc_timer(self) -> None:
         """Start the 300ms timeout for single ESC."""
@@ -255,7 +305,7 @@ class ShellWrapper:
 
     def _esc_timeout_fired(self) -> None:
         """Single ESC timeout expired — forward the ESC to shell."""
-        self._esc_pending = False
+        self._esc_state = _IDLE
         self._esc_timer = None
         self._write_to_master(b"\x1b")
 
@@ -274,7 +324,7 @@ class ShellWrapper:
 
     def _shortcut_timeout_fired(self) -> None:
         """Shortcut window expired — enter normal AI mode."""
-        self._double_esc_pending = False
+        self._esc_state = _IDLE
         self._shortcut_timer = None
         self._enter_ai_mode()
 
@@ -290,61 +340,131 @@ class ShellWrapper:
 
     def _write_to_master(self, data: bytes) -> None:
         """Write data to the master PTY fd."""
-        if self._master_fd >= 0:
+        fd = self._master_fd
+        if fd < 0:
+            return
+        view = memoryview(data)
+        while view:
             try:
-                os.write(self._master_fd, data)
+                written = os.write(fd, view)
+            except BlockingIOError:
+                # The master is non-blocking for reads; when the shell's input
+                # queue is full, wait for room as a blocking write would
+                select.select([], [fd], [])
+                continue
             except OSError:
-                pass
+                return
+            view = view[written:]
+
+    def _write_many_to_master(self, parts: tuple[bytes, ...]) -> None:
+        """Write several buffers to the master PTY fd with one writev()."""
+        fd = self._master_fd
+        if fd < 0:
+            return
+        try:
+            written = os.writev(fd, parts)
+        except BlockingIOError:
+            written = 0
+        except OSError:
+            return
+        if written < sum(map(len, parts)):
+            self._write_to_master(b"".join(parts)[written:])
 
     def _on_master_ready(self) -> None:
         """Handle data available on master_fd (shell output)."""
+        view = self._read_view
+        filled = 0
         try:
-            data = os.read(self._master_fd, 4096)
+            for _ in range(_MAX_DRAIN_READS):
+                n = os.readv(self._master_fd, [view[filled : filled + _READ_SIZE]])
+                if not n:
+                    self._stop()
+                    break
+                filled += n
+                if n < _READ_SIZE:
+                    break
+        except BlockingIOError:
+            pass
         except OSError:
-            self._running = False
-            return
+            self._stop()
 
-        if not data:
-            self._running = False
+        if not filled:
             return
+        data = view[:filled]
 
         # Write to stdout (user sees shell output)
         # Suppress during AI mode unless PTY tool execution is active
         if not self._ai_mode or self._show_pty_output:
             try:
-                os.write(sys.stdout.fileno(), data)
+                os.write(self._stdout_fd, data)
             except OSError:
                 pass
 
-        # Notify callbacks (e.g., pyte scrollback capture) — always active
+        # Notify callbacks (e.g., pyte scrollback capture) — always active.
+        # They must copy anything they keep: the buffer is reused next read.
         for cb in self._on_master_output:
             try:
                 cb(data)
             except Exception:
                 pass
 
+    async def read_line(self) -> str:
+        """Wait for one line on stdin (cooked mode) without blocking the loop.
+
+        The stdin reader is pointed at this line for the duration, so the
+        keystrokes never reach the shell or the AI input callback.
+        """
+        loop = self._loop or asyncio.get_running_loop()
+        fd = self._stdin_fd
+        line: asyncio.Future[str] = loop.create_future()
+        buf = bytearray()
+
+        def on_ready() -> None:
+            try:
+                data = os.read(fd, 1024)
+            except OSError:
+                data = b""
+            buf.extend(data)
+            end = buf.find(b"\n")
+            if end != -1:
+                del buf[end:]
+            elif data:
+                return
+            # Got a full line, or an empty read (Ctrl+D): answer with the buffer
+            if not line.done():
+                line.set_result(buf.decode(errors="replace"))
+
+        loop.add_reader(fd, on_ready)
+        try:
+            return await line
+        finally:
+            if self._exit_event is not None and not self._exit_event.is_set():
+                loop.add_reader(fd, self._on_stdin_ready)
+            else:
+                loop.remove_reader(fd)
+
     async def run(self) -> None:
         """Run the asyncio event loop proxying I/O between stdin/stdout and the PTY."""
         self._loop = asyncio.get_running_loop()
-        self._running = True
+        self._exit_event = asyncio.Event()
 
-        # Install signal handlers
-        old_sigwinch = signal.signal(signal.SIGWINCH, self._handle_sigwinch)
-        old_sigchld = signal.signal(signal.SIGCHLD, self._handle_sigchld)
+        # Install signal handlers on the loop: they run as ordinary callbacks
+        # between I/O events rather than interrupting them
+        self._loop.add_signal_handler(signal.SIGWINCH, self._handle_sigwinch)
+        self._loop.add_signal_handler(signal.SIGCHLD, self._handle_sigchld)
 
         # Register fd readers
-        self._loop.add_reader(sys.stdin.fileno(), self._on_stdin_ready)
+        self._loop.add_reader(self._stdin_fd, self._on_stdin_ready)
         self._loop.add_reader(self._master_fd, self._on_master_ready)
 
         try:
             # Wait until the shell exits
-            while self._running:
-                await asyncio.sleep(0.1)
+            await self._exit_event.wait()
         finally:
-            self._loop.remove_reader(sys.stdin.fileno())
+            self._loop.remove_reader(self._stdin_fd)
             self._loop.remove_reader(self._master_fd)
-            signal.signal(signal.SIGWINCH, old_sigwinch)
-            signal.signal(signal.SIGCHLD, old_sigchld)
+            self._loop.remove_signal_handler(signal.SIGWINCH)
+            self._loop.remove_signal_handler(signal.SIGCHLD)
 
     def cleanup(self) -> None:
         """Restore terminal and clean up resources."""
@@ -352,7 +472,7 @@ class ShellWrapper:
         if self._original_termios is not None:
             try:
                 termios.tcsetattr(
-                    sys.stdin.fileno(), termios.TCSADRAIN, self._original_termios
+                    self._stdin_fd, termios.TCSADRAIN, self._original_termios
                 )
             except (termios.error, OSError):
                 pass
@@ -368,10 +488,7 @@ class ShellWrapper:
 
         # Wait for child
         if self._child_pid > 0:
-            try:
-                os.waitpid(self._child_pid, os.WNOHANG)
-            except ChildProcessError:
-                pass
+            self._reap()
             self._child_pid = -1
 
     def write_to_shell(self, data: bytes) -> None:
@@ -6,8 +6,26 @@ import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    # Optional native parser (pip install llaminal[fast])
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
 DEFAULT_DB_PATH = Path.home() / ".local" / "share" / "llaminal" / "history.db"
 
+# Stored in PRAGMA user_version once the tables below exist
+_SCHEMA_VERSION = 2
+
+# Statements run on every save. sqlite3 keeps a per-connection cache of
+# prepared statements keyed by SQL text, so these are compiled once.
+_INSERT_MESSAGE = (
+    "INSERT INTO messages (session_id, role, content, tool_calls, tool_call_id, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_TOUCH_SESSION_TITLED = "UPDATE sessions SET title = COALESCE(title, ?), updated_at = ? WHERE id = ?"
+_TOUCH_SESSION = "UPDATE sessions SET updated_at = ? WHERE id = ?"
+
 
 class Storage:
     """Stores conversation sessions and messages in SQLite."""
@@ -15,11 +33,23 @@ class Storage:
     def __init__(self, db_path: Path | None = None) -> None:
         self.db_path = db_path or DEFAULT_DB_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(self.db_path))
+        # AIMode saves from a worker thread, one at a time (its single writer task)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self._conn.row_factory = sqlite3.Row
+        # WAL makes a commit an append to the log rather than a rewrite of the
+        # database plus rollback journal; with synchronous=NORMAL it is fsynced
+        # at checkpoints instead of on every commit. Still crash-safe — at
+        # worst the last few saves are lost on power failure.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
         self._init_db()
 
     def _init_db(self) -> None:
+        # Already set up: skip the DDL script (and its implicit COMMIT)
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version >= _SCHEMA_VERSION:
+            return
         self._conn.executescript("""
             CREATE TABLE IF NOT EXISTS sessions (
                 id TEXT PRIMARY KEY,
@@ -37,7 +67,10 @@ class Storage:
                 tool_call_id TEXT,
                 created_at TEXT NOT NULL
             );
+            CREATE INDEX IF NOT EXISTS idx_messages_session_role ON messages(session_id, role);
+            CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at);
         """)
+        self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
 
     def create_session(self, model: str) -> str:
         """Create a new session and return its ID."""
@@ -71,25 +104,16 @@ class Storage:
             if role == "user" and content and title_candidate is None:
                 title_candidate = content[:80]
 
-        self._conn.executemany(
-            "INSERT INTO messages (session_id, role, content, tool_calls, tool_call_id, created_at) "
-            "VALUES (?, ?, ?, ?, ?, ?)",
-            rows,
-        )
-
-        # Set title if session doesn't have one yet
-        if title_candidate:
-            self._conn.execute(
-                "UPDATE sessions SET title = COALESCE(title, ?), updated_at = ? WHERE id = ?",
-                (title_candidate, now, session_id),
-            )
-        else:
-            self._conn.execute(
-                "UPDATE sessions SET updated_at = ? WHERE id = ?",
-                (now, session_id),
-            )
+        # One transaction: commits on success, and rolls back on error so a
+        # half-written batch isn't committed along with the next save
+        with self._conn:
+            self._conn.executemany(_INSERT_MESSAGE, rows)
 
-        self._conn.commit()
+            # Set title if session doesn't have one yet
+            if title_candidate:
+                self._conn.execute(_TOUCH_SESSION_TITLED, (title_candidate, now, session_id))
+            else:
+                self._conn.execute(_TOUCH_SESSION, (now, session_id))
 
     def load_session(self, session_id: str) -> list[dict]:
         """Load all messages for a session, returning them in OpenAI format."""
@@ -105,7 +129,7 @@ class Storage:
             if row["content"] is not None:
                 msg["content"] = row["content"]
             if row["tool_calls"] is not None:
-                msg["tool_calls"] = json.loads(row["tool_calls"])
+                msg["tool_calls"] = _loads(row["tool_calls"])
             if row["tool_call_id"] is not None:
                 msg["tool_call_id"] = row["tool_call_id"]
             messages.append(msg)
@@ -101,7 +101,8 @@ THEMES: dict[str, Theme] = {
     ),
 }
 
-THEME_NAMES = sorted(THEMES.keys())
+# Sorted names for --theme; keep in step with THEMES
+THEME_NAMES = ("catppuccin", "default", "dracula", "light", "llama", "solarized")
 
 # Module-level active theme — set at startup
 _active_theme: Theme = THEMES["default"]
@@ -0,0 +1,32 @@
+"""Parsing of tool-call argument strings from the model."""
+
+import json
+from typing import Any
+
+try:
+    # Optional native parser (pip install llaminal[fast]); its
+    # JSONDecodeError subclasses json.JSONDecodeError
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+_decoder = json.JSONDecoder()
+
+
+def parse_arguments(text: str) -> dict[str, Any]:
+    """Parse a complete arguments string into a dict, or {} if it isn't one.
+
+    Trailing junk after the top-level object (which some servers emit) is
+    ignored. A truncated payload is never repaired: running a cut-off
+    write_file or bash call as if it were whole is worse than failing it.
+    """
+    if not text.strip():
+        return {}
+    try:
+        value = _loads(text)
+    except json.JSONDecodeError:
+        try:
+            value, _end = _decoder.raw_decode(text.lstrip())
+        except json.JSONDecodeError:
+            return {}
+    return value if isinstance(value, dict) else {}
@@ -3,9 +3,36 @@
 import asyncio
 import os
 
+from llaminal.prompt import ask
 from llaminal.tools.registry import Tool
 
 DEFAULT_TIMEOUT = 30
+MAX_OUTPUT_CHARS = 10_000
+# Bytes kept per stream: enough for MAX_OUTPUT_CHARS of any UTF-8 text
+_MAX_OUTPUT_BYTES = 4 * MAX_OUTPUT_CHARS
+
+
+async def _read_capped(stream: asyncio.StreamReader) -> tuple[bytes, bool]:
+    """Read a stream to EOF, keeping only the first _MAX_OUTPUT_BYTES.
+
+    The rest is still read (and dropped) so the command never stalls on a
+    full pipe. Returns the kept bytes and whether anything was dropped.
+    """
+    buf = bytearray()
+    dropped = False
+    while chunk := await stream.read(65536):
+        room = _MAX_OUTPUT_BYTES - len(buf)
+        if len(chunk) > room:
+            dropped = True
+        if room > 0:
+            buf += chunk[:room]
+    return bytes(buf), dropped
+
+
+def _cap(text: str, dropped: bool) -> str:
+    if dropped or len(text) > MAX_OUTPUT_CHARS:
+        return text[:MAX_OUTPUT_CHARS] + "\n... (truncated)"
+    return text
 
 
 async def _run_bash(command: str) -> str:
@@ -13,7 +40,7 @@ async def _run_bash(command: str) -> str:
     cwd = os.getcwd()
     print(f"\n  Command: {command}")
     print(f"  Working directory: {cwd}")
-    answer = input("  Execute? [y/N] ").strip().lower()
+    answer = (await ask("  Execute? [y/N] ")).strip().lower()
     if answer != "y":
         return "Command execution cancelled by user."
 
@@ -23,8 +50,11 @@ async def _run_bash(command: str) -> str:
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
-        stdout_bytes, stderr_bytes = await asyncio.wait_for(
-            proc.communicate(), timeout=DEFAULT_TIMEOUT
+        # Read both pipes as output arrives instead of communicate(), which
+        # would hold everything a runaway command prints in memory
+        (stdout_bytes, stdout_dropped), (stderr_bytes, stderr_dropped), _ = await asyncio.wait_for(
+            asyncio.gather(_read_capped(proc.stdout), _read_capped(proc.stderr), proc.wait()),
+            timeout=DEFAULT_TIMEOUT,
         )
     except asyncio.TimeoutError:
         proc.kill()
@@ -37,14 +67,9 @@ async def _run_bash(command: str) -> str:
             f"Error: command timed out after {DEFAULT_TIMEOUT}s"
         )
 
-    stdout = stdout_bytes.decode(errors="replace") if stdout_bytes else ""
-    stderr = stderr_bytes.decode(errors="replace") if stderr_bytes else ""
-
     # Cap output length
-    if len(stdout) > 10_000:
-        stdout = stdout[:10_000] + "\n... (truncated)"
-    if len(stderr) > 10_000:
-        stderr = stderr[:10_000] + "\n... (truncated)"
+    stdout = _cap(stdout_bytes.decode(errors="replace"), stdout_dropped)
+    stderr = _cap(stderr_bytes.decode(errors="replace"), stderr_dropped)
 
     return (
         f"stdout: {stdout}\n"
@@ -1,37 +1,200 @@
 """File tools — read, write, and list files."""
 
-import difflib
-import glob as globmod
+import asyncio
+import fnmatch
+import functools
+import heapq
+import os
+import re
+import sys
+from collections.abc import Iterator
 from pathlib import Path
 
+from llaminal.prompt import ask
 from llaminal.tools.registry import Tool
 
+try:
+    # Optional C implementation of difflib's matcher (pip install llaminal[diff])
+    from cdifflib import CSequenceMatcher as _SequenceMatcher
+except ImportError:
+    from difflib import SequenceMatcher as _SequenceMatcher
+
 MAX_FILE_SIZE = 100 * 1024  # 100KB
 MAX_LIST_RESULTS = 200
+# Above this size (either side) write_file skips the diff preview: matching
+# is quadratic in the changed region and a huge diff isn't reviewable anyway
+DIFF_PREVIEW_LIMIT = 32 * 1024
+_SNIFF_SIZE = 8192  # bytes checked for NULs before a file is treated as text
+# Leading bytes of binary formats read_file rejects before sniffing:
+# ELF, PNG, ZIP (also jar/docx/whl), JPEG, GIF, gzip and PDF
+_BINARY_SIGNATURES = (b"\x7fELF", b"\x89PNG", b"PK\x03\x04", b"\xff\xd8\xff", b"GIF8", b"\x1f\x8b", b"%PDF-")
+_SIGNATURE_SIZE = 8
+
+_MAGIC_RE = re.compile(r"[*?[]")
+
+
+def _unified_diff(old_lines: list[str], new_lines: list[str]) -> str:
+    """Unified diff in difflib.unified_diff(..., "before", "after") format, on the fastest matcher."""
+    # Only the changed middle goes to the matcher: strip the common leading
+    # and trailing lines first, as GNU diff does, and add them back as equal
+    # runs so hunks still get their full context
+    end = min(len(old_lines), len(new_lines))
+    head = 0
+    while head < end and old_lines[head] == new_lines[head]:
+        head += 1
+    tail = 0
+    while tail < end - head and old_lines[-1 - tail] == new_lines[-1 - tail]:
+        tail += 1
+    old_end = len(old_lines) - tail
+    new_end = len(new_lines) - tail
+    if head == old_end and head == new_end:
+        return ""
+
+    old_chars, new_chars = _lines_to_chars(old_lines[head:old_end], new_lines[head:new_end])
+    # The middle starts and ends on differing lines, so its opcodes never
+    # begin or end with an equal run that would need merging
+    codes = [
+        (tag, head + i1, head + i2, head + j1, head + j2)
+        for tag, i1, i2, j1, j2 in _SequenceMatcher(None, old_chars, new_chars).get_opcodes()
+    ]
+    if head:
+        codes.insert(0, ("equal", 0, head, 0, head))
+    if tail:
+        codes.append(("equal", old_end, len(old_lines), new_end, len(new_lines)))
+
+    out = ["--- before\n+++ after\n"]
+    for group in _group_opcodes(codes, 3):
+        first, last = group[0], group[-1]
+        old_range = _hunk_range(first[1], last[2])
+        new_range = _hunk_range(first[3], last[4])
+        out.append(f"@@ -{old_range} +{new_range} @@\n")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                out.extend(f" {line}\n" for line in old_lines[i1:i2])
+                continue
+            if tag != "insert":
+                out.extend(f"-{line}\n" for line in old_lines[i1:i2])
+            if tag != "delete":
+                out.extend(f"+{line}\n" for line in new_lines[j1:j2])
+    return "".join(out)
+
+
+def _group_opcodes(codes: list[tuple], n: int) -> Iterator[list[tuple]]:
+    """Split opcodes into hunks with n lines of context, as SequenceMatcher.get_grouped_opcodes does."""
+    tag, i1, i2, j1, j2 = codes[0]
+    if tag == "equal":
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    tag, i1, i2, j1, j2 = codes[-1]
+    if tag == "equal":
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    group: list[tuple] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # An equal run longer than both contexts ends one hunk and starts the next
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _diff_lines(text: str) -> list[str]:
+    """Split text into lines without their newlines, for _unified_diff.
+
+    A last line with no newline carries GNU diff's marker, so it differs
+    from the same line with one and the marker prints beneath it.
+    """
+    lines = text.split("\n")
+    if lines[-1]:
+        lines[-1] += "\n\\ No newline at end of file"
+    else:
+        lines.pop()
+    return lines
+
+
+def _lines_to_chars(old_lines: list[str], new_lines: list[str]) -> tuple[str, str]:
+    """Encode each distinct line as one character, as diff-match-patch's line mode does."""
+    # The matcher then hashes and compares single characters instead of whole
+    # lines; equal lines share a code, so the opcodes index the same lines
+    codes: dict[str, str] = {}
+    encoded = []
+    for lines in (old_lines, new_lines):
+        chars = []
+        for line in lines:
+            code = codes.get(line)
+            if code is None:
+                code = codes[line] = chr(len(codes))
+            chars.append(code)
+        encoded.append("".join(chars))
+    return encoded[0], encoded[1]
+
+
+def _hunk_range(start: int, stop: int) -> str:
+    """Format a hunk's line range the way unified diffs do."""
+    length = stop - start
+    if length == 1:
+        return str(start + 1)
+    # An empty range names the line before it
+    return f"{start + 1 if length else start},{length}"
 
 
 async def _read_file(path: str) -> str:
     """Read and return the contents of a file."""
+    # File I/O runs on a worker thread so the event loop keeps serving the PTY
+    return await asyncio.to_thread(_read_text, path)
+
+
+def _read_text(path: str) -> str:
+    """Blocking body of _read_file."""
     try:
         p = Path(path).expanduser()
 
-        if not p.exists():
+        try:
+            size = p.stat().st_size
+        except FileNotFoundError:
             return f"Error: file not found: {path}"
 
-        size = p.stat().st_size
         if size > MAX_FILE_SIZE:
             return f"Error: file is {size:,} bytes, exceeds {MAX_FILE_SIZE:,} byte limit"
 
-        # Binary detection: read a sample and check for null bytes
-        raw = p.read_bytes()
-        if b"\x00" in raw[:8192]:
-            return f"Error: file appears to be binary: {path}"
+        with p.open("rb", buffering=0) as f:
+            # Binary detection: common binary formats are recognised from
+            # their first bytes; otherwise read a sample and check for null
+            # bytes, and only read the rest once the file looks like text
+            head = f.read(_SIGNATURE_SIZE)
+            if head.startswith(_BINARY_SIGNATURES):
+                return f"Error: file appears to be binary: {path}"
+            head += f.read(_SNIFF_SIZE - len(head))
+            if b"\x00" in head:
+                return f"Error: file appears to be binary: {path}"
+            rest = f.readall()
 
+        raw = head + rest if rest else head
         return raw.decode(errors="replace")
     except Exception as e:
         return f"Error reading {path}: {e}"
 
 
+def _diff_preview(p: Path, content: str) -> str:
+    """Return the preview shown before overwriting p with content ("" if p is new)."""
+    try:
+        old_size = p.stat().st_size
+    except FileNotFoundError:
+        return ""
+    # Nobody reads the diff in scripted runs, so skip reading and matching
+    if os.environ.get("LLAMINAL_SKIP_DIFF_PREVIEW") or not sys.stdin.isatty():
+        return f"  (replacing {old_size:,} bytes; diff preview skipped)"
+    try:
+        if max(old_size, len(content)) > DIFF_PREVIEW_LIMIT:
+            return f"  (replacing {old_size:,} bytes; too large for a diff preview)"
+        diff_text = _unified_diff(_diff_lines(p.read_text()), _diff_lines(content))
+    except Exception:
+        return "  (could not generate diff preview)"
+    return f"  Diff preview:\n{diff_text}" if diff_text else "  (no changes)"
+
+
 async def _write_file(path: str, content: str) -> str:
     """Write content to a file after user confirmation."""
     try:
@@ -40,42 +203,178 @@ async def _write_file(path: str, content: str) -> str:
         print(f"\n  Write to: {path} ({len(content)} chars)")
 
         # Show diff preview when overwriting
-        if p.exists():
-            try:
-                old_lines = p.read_text().splitlines(keepends=True)
-                new_lines = content.splitlines(keepends=True)
-                diff = difflib.unified_diff(old_lines, new_lines, fromfile="before", tofile="after")
-                diff_text = "".join(diff)
-                if diff_text:
-                    print(f"  Diff preview:\n{diff_text}")
-                else:
-                    print("  (no changes)")
-            except Exception:
-                print("  (could not generate diff preview)")
+        preview = await asyncio.to_thread(_diff_preview, p, content)
+        if preview:
+            print(preview)
 
-        answer = input("  Proceed? [y/N] ").strip().lower()
+        answer = (await ask("  Proceed? [y/N] ")).strip().lower()
         if answer != "y":
             return "Write cancelled by user."
 
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(content)
+        await asyncio.to_thread(_write_text, p, content)
         return f"Wrote {len(content)} chars to {path}"
     except Exception as e:
         return f"Error writing {path}: {e}"
 
 
+def _write_text(p: Path, content: str) -> None:
+    """Blocking body of the confirmed write."""
+    p.parent.mkdir(parents=True, exist_ok=True)
+    # Encoded up front, the whole file goes to the kernel in one write() call
+    # rather than being pushed through the text layer's 8 KiB buffer
+    p.write_bytes(content.encode())
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_pattern(pattern: str) -> tuple[str, tuple, tuple, tuple]:
+    """Split a magic glob pattern into its walk root and per-segment matchers.
+
+    Cached, since the agent tends to list the same few patterns repeatedly.
+    """
+    # Leading literal segments are simply where the walk starts
+    parts = pattern.split(os.sep)
+    n = 0
+    while not _MAGIC_RE.search(parts[n]):
+        n += 1
+    root = os.sep.join(parts[:n]) or (os.sep if n else "")
+    segs = [s for s in parts[n:] if s]
+    matchers = tuple(None if s == "**" else re.compile(fnmatch.translate(s)).match for s in segs)
+    # Literal segments are looked up directly rather than found by a scan
+    literals = tuple(None if _MAGIC_RE.search(s) else s for s in segs)
+    # Wildcards skip dot-files unless the segment itself starts with "."
+    hidden_ok = tuple(s.startswith(".") for s in segs)
+    return root, matchers, literals, hidden_ok
+
+
+def _iglob(pattern: str) -> Iterator[str]:
+    """Yield paths matching pattern, as glob.iglob(pattern, recursive=True) does.
+
+    glob lists a directory once to recurse through "**" and again to match
+    the next segment in it; here each directory is scanned once and every
+    segment that applies to it is matched against that one listing, with
+    entry types taken from the DirEntry. Like glob, "**" follows symlinked
+    directories, except a link back to the directory itself or one of its
+    ancestors: glob recurses through such a cycle until the path gets too
+    long, while here the cycle is entered once.
+    """
+    if not _MAGIC_RE.search(pattern):
+        if os.path.lexists(pattern):
+            yield pattern
+        return
+
+    root, matchers, literals, hidden_ok = _compile_pattern(pattern)
+    if root and not os.path.isdir(root):
+        return
+    last = len(matchers) - 1
+
+    # Walk states: (i, False) means "match segs[i] against this directory's
+    # entries"; (i, True) means "inside the ** at segs[i], at least one
+    # directory deep", where every entry but dot-files is a candidate
+    def enter(path: str, states: set[tuple[int, bool]]) -> Iterator[str]:
+        """Resolve the zero-directory case of each fresh **, yielding any match."""
+        todo = [i for i, inside in states if not inside and matchers[i] is None]
+        while todo:
+            i = todo.pop()
+            states.add((i, True))
+            if i == last:
+                if path:
+                    yield os.path.join(path, "")  # "dir/**" matches "dir/" itself
+            elif (i + 1, False) not in states:
+                states.add((i + 1, False))
+                if matchers[i + 1] is None:
+                    todo.append(i + 1)
+
+    stack: list[tuple[str, set[tuple[int, bool]]]] = [(root, {(0, False)})]
+    while stack:
+        path, states = stack.pop()
+        yield from enter(path, states)
+
+        children: dict[str, set[tuple[int, bool]]] = {}
+        scan_states = []
+        for i, inside in states:
+            name = literals[i]
+            if inside or name is None:
+                scan_states.append((i, inside))
+                continue
+            target = os.path.join(path, name)
+            if i == last:
+                if os.path.lexists(target):
+                    yield target
+            elif os.path.isdir(target):
+                children.setdefault(name, set()).add((i + 1, False))
+
+        entries: list[os.DirEntry] = []
+        if scan_states:
+            try:
+                with os.scandir(path or ".") as it:
+                    entries = list(it)
+            except OSError:
+                pass
+        for entry in entries:
+            name = entry.name
+            hidden = name[0] == "."
+            for i, inside in scan_states:
+                if inside:
+                    if hidden:
+                        continue
+                    if i == last:
+                        yield os.path.join(path, name)
+                    next_state = (i + 1, False) if i < last else None
+                elif matchers[i] is None or (hidden and not hidden_ok[i]) or not matchers[i](name):
+                    continue
+                elif i == last:
+                    yield os.path.join(path, name)
+                    continue
+                else:
+                    next_state = (i + 1, False)
+                try:
+                    if not entry.is_dir():
+                        continue
+                    if inside and entry.is_symlink() and _links_to_ancestor(path, entry):
+                        continue
+                except OSError:
+                    continue
+                child = children.setdefault(name, set())
+                if inside:
+                    child.add((i, True))
+                if next_state is not None:
+                    child.add(next_state)
+
+        stack.extend((os.path.join(path, name), child) for name, child in children.items())
+
+
+def _links_to_ancestor(path: str, entry: os.DirEntry) -> bool:
+    """Whether the symlink entry in path leads back to path or above it."""
+    target = os.path.realpath(entry.path)
+    here = os.path.realpath(path or ".")
+    return here == target or here.startswith(target.rstrip(os.sep) + os.sep)
+
+
+def _first_matches(pattern: str) -> tuple[list[str], int]:
+    """Return the MAX_LIST_RESULTS smallest matches, sorted, and the total match count."""
+    # The walker yields each path once, so only the shown names are kept:
+    # a bounded heap instead of materializing and sorting every match
+    total = 0
+
+    def counted() -> Iterator[str]:
+        nonlocal total
+        for path in _iglob(pattern):
+            total += 1
+            yield path
+
+    return heapq.nsmallest(MAX_LIST_RESULTS, counted()), total
+
+
 async def _list_files(pattern: str) -> str:
     """List files matching a glob pattern."""
     try:
         expanded = str(Path(pattern).expanduser())
-        matches = sorted(globmod.glob(expanded, recursive=True))
-        total = len(matches)
+        matches, total = await asyncio.to_thread(_first_matches, expanded)
 
         if not matches:
             return f"No files matching '{pattern}'"
 
         if total > MAX_LIST_RESULTS:
-            matches = matches[:MAX_LIST_RESULTS]
             return "\n".join(matches) + f"\n... ({total} total, showing first {MAX_LIST_RESULTS})"
 
         return "\n".join(matches)
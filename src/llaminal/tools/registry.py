@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Tool:
     name: str
     description: str
@@ -19,16 +19,31 @@ class ToolRegistry:
 
     def __init__(self) -> None:
         self._tools: dict[str, Tool] = {}
+        self._schema_cache: list[dict[str, Any]] | None = None
 
-    def register(self, tool: Tool) -> None:
+    def register(self, tool: Tool, replace: bool = False) -> None:
+        """Add a tool; pass replace=True to deliberately override one by name."""
+        if not replace and tool.name in self._tools:
+            raise ValueError(f"Tool '{tool.name}' is already registered")
         self._tools[tool.name] = tool
+        self._schema_cache = None
+
+    def register_many(self, *tools: Tool) -> None:
+        for tool in tools:
+            self.register(tool)
 
     def get(self, name: str) -> Tool | None:
         return self._tools.get(name)
 
     def to_openai_schema(self) -> list[dict[str, Any]]:
-        """Return tool definitions in OpenAI function-calling format."""
-        return [
+        """Return tool definitions in OpenAI function-calling format.
+
+        The list is cached until the next register(), so repeated agent turns
+        reuse the same object.
+        """
+        if self._schema_cache is not None:
+            return self._schema_cache
+        self._schema_cache = [
             {
                 "type": "function",
                 "function": {
@@ -39,6 +54,7 @@ class ToolRegistry:
             }
             for t in self._tools.values()
         ]
+        return self._schema_cache
 
     async def execute(self, name: str, args: dict) -> str:
         tool = self._tools.get(name)
@@ -0,0 +1,14 @@
+"""The --mood and --theme choice lists must cover every preset."""
+
+from llaminal.moods import MOOD_NAMES, MOODS
+from llaminal.themes import THEME_NAMES, THEMES
+
+
+def test_mood_names_match_moods():
+    assert set(MOOD_NAMES) == set(MOODS)
+    assert list(MOOD_NAMES) == sorted(MOOD_NAMES)
+
+
+def test_theme_names_match_themes():
+    assert set(THEME_NAMES) == set(THEMES)
+    assert list(THEME_NAMES) == sorted(THEME_NAMES)
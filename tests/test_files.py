@@ -0,0 +1,145 @@
+"""write_file's diff preview and list_files' glob walker."""
+
+import difflib
+import glob
+import os
+import random
+import re
+
+import pytest
+
+from llaminal.tools.files import _diff_lines, _iglob, _unified_diff
+
+_HUNK_RE = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def _difflib(old: list[str], new: list[str]) -> str:
+    return "".join(difflib.unified_diff(
+        [line + "\n" for line in old], [line + "\n" for line in new], "before", "after"
+    ))
+
+
+def _hunks(diff: str) -> list[tuple[int, int, list[str]]]:
+    """(old start index, old length, body lines) for each hunk."""
+    hunks = []
+    for line in diff.splitlines()[2:]:
+        m = _HUNK_RE.match(line)
+        if m:
+            start, length = int(m[1]), int(m[2] or 1)
+            hunks.append((start - 1 if length else start, length, []))
+        else:
+            hunks[-1][2].append(line)
+    return hunks
+
+
+def _apply(old: list[str], diff: str) -> list[str]:
+    out, pos = [], 0
+    for start, _length, body in _hunks(diff):
+        out += old[pos:start]
+        pos = start
+        for line in body:
+            if line[0] in " -":
+                assert old[pos] == line[1:]
+                pos += 1
+            if line[0] in " +":
+                out.append(line[1:])
+    return out + old[pos:]
+
+
+def _edit(rng: random.Random, lines: list[str], near: str) -> list[str]:
+    """Apply a few random edits, all within 5 lines of the start or end."""
+    new = list(lines)
+    for _ in range(rng.randint(1, 3)):
+        offset = rng.randint(0, min(5, len(new)))
+        i = offset if near == "start" else len(new) - offset
+        op = rng.random()
+        if op < 0.4 or i >= len(new):
+            new.insert(i, f"new {rng.random()}")
+        elif op < 0.7:
+            del new[i]
+        else:
+            new[i] = f"changed {rng.random()}"
+    return new
+
+
+@pytest.mark.parametrize("near", ["start", "end"])
+def test_matches_difflib_for_edits_near_the_ends(near):
+    rng = random.Random(near)
+    for _ in range(500):
+        old = [f"line {n}" for n in range(rng.randint(0, 40))]
+        new = _edit(rng, old, near)
+        assert _unified_diff(old, new) == _difflib(old, new)
+
+
+@pytest.mark.parametrize("near", ["start", "end"])
+def test_hunks_keep_full_context_with_repeated_lines(near):
+    # With repeated lines the alignment may legitimately differ from
+    # difflib's, but every diff must apply and carry 3 lines of context
+    # wherever the file continues
+    rng = random.Random(near)
+    for _ in range(1000):
+        old = [rng.choice("abcdefg") for _ in range(rng.randint(0, 40))]
+        new = _edit(rng, old, near)
+        diff = _unified_diff(old, new)
+        assert _apply(old, diff) == new
+        for start, length, body in _hunks(diff):
+            leading = next(i for i, line in enumerate(body) if line[0] != " ")
+            trailing = next(i for i, line in enumerate(reversed(body)) if line[0] != " ")
+            assert leading == 3 or start == 0
+            assert trailing == 3 or start + length == len(old)
+
+
+def test_missing_final_newline_is_marked():
+    diff = _unified_diff(_diff_lines("a\nb"), _diff_lines("a\nb\n"))
+    assert diff == "--- before\n+++ after\n@@ -1,2 +1,2 @@\n a\n-b\n\\ No newline at end of file\n+b\n"
+
+
+def test_no_changes():
+    assert _unified_diff(_diff_lines("a\nb\n"), _diff_lines("a\nb\n")) == ""
+
+
+def _build_tree(rng: random.Random, root, depth: int = 0) -> list[str]:
+    """Random files, dirs and dot-files under root; returns the dirs made."""
+    dirs = []
+    for name in rng.sample(["a", "b", "ab", ".h", "c.py", "d.txt", ".x.py", "e"], rng.randint(1, 5)):
+        path = root / name
+        if depth < 3 and rng.random() < 0.45:
+            path.mkdir()
+            dirs.append(path)
+            dirs += _build_tree(rng, path, depth + 1)
+        else:
+            path.touch()
+    return dirs
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_iglob_matches_glob(tmp_path, monkeypatch, seed):
+    rng = random.Random(seed)
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    targets = [shared] + _build_tree(rng, shared)
+    dirs = _build_tree(rng, tmp_path)
+    # Symlinks into a tree without links of its own, so there are no cycles
+    for n, parent in enumerate([tmp_path] + rng.sample(dirs, min(3, len(dirs)))):
+        (parent / f"link{n}").symlink_to(rng.choice(targets), target_is_directory=True)
+    (tmp_path / "filelink.py").symlink_to(tmp_path / "shared")
+    (tmp_path / "broken.py").symlink_to(tmp_path / "missing")
+    monkeypatch.chdir(tmp_path)
+
+    segments = ["*", "**", "a", "b*", "*.py", ".*", "?", "[ab]", "link*", "shared"]
+    patterns = {"**", "**/*.py", "*/**", "a/**", "./**/*.py", f"{tmp_path}/**/*.py", "missing/*"}
+    for _ in range(400):
+        patterns.add("/".join(rng.choice(segments) for _ in range(rng.randint(1, 4))))
+    for pattern in sorted(patterns):
+        # glob also yields "file/" for a file under a trailing "**"
+        expected = {p for p in glob.glob(pattern, recursive=True) if not p.endswith("/") or os.path.isdir(p)}
+        assert set(_iglob(pattern)) == expected, pattern
+
+
+def test_iglob_enters_a_symlink_cycle_once(tmp_path, monkeypatch):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "b" / "f.py").touch()
+    (tmp_path / "a" / "b" / "up").symlink_to("..")
+    monkeypatch.chdir(tmp_path)
+    assert sorted(_iglob("**/*.py")) == ["a/b/f.py"]
+    assert sorted(_iglob("**/up/*")) == ["a/b/up/b"]